@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import time
+import logging
+
+from url_canon import canonical_url
+from search_index import ArticleIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleStore:
+    """Локальное хранилище статей из RSS, ключ - канонический адрес.
+
+    Статьи держатся в памяти за последние retention_days дней; если задан path,
+    они дублируются в SQLite и переживают перезапуск бота. Поиск идет по
+    собственному инвертированному индексу без вытеснения: в нем ровно те статьи,
+    что лежат в хранилище.
+    """
+
+    def __init__(self, path=None, retention_days=7, index=None):
+        self.retention = retention_days * 24 * 3600
+        self.index = index or ArticleIndex(max_docs=None)
+        self._articles = {}
+        self._conn = None
+        if path:
+            self._open(path)
+
+    def __len__(self):
+        return len(self._articles)
+
+    def _open(self, path):
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS articles ('
+                'key TEXT PRIMARY KEY, timestamp REAL NOT NULL, value TEXT NOT NULL)'
+            )
+            rows = self._conn.execute(
+                'SELECT key, value FROM articles WHERE timestamp > ?', (time.time() - self.retention,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Хранилище статей {path} недоступно, работаем в памяти: {e}")
+            self._conn = None
+            return
+
+        for key, value in rows:
+            try:
+                self._articles[key] = json.loads(value)
+            except ValueError:
+                continue
+            self.index.add(self._articles[key])
+        logger.info(f"📚 Загружено статей из {path}: {len(self._articles)}")
+
+    def add(self, article):
+        """Сохраняет статью; возвращает False, если она уже есть или слишком старая"""
+        key = canonical_url(article.get('url'))
+        if not key or key in self._articles:
+            return False
+        if article.get('timestamp', 0) < time.time() - self.retention:
+            return False
+
+        self._articles[key] = article
+        self.index.add(article)
+        if self._conn is not None:
+            try:
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO articles (key, timestamp, value) VALUES (?, ?, ?)',
+                    (key, article['timestamp'], json.dumps(article, ensure_ascii=False, default=str))
+                )
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"⚠️ Ошибка записи статьи в SQLite: {e}")
+        return True
+
+    def recent(self, since=0):
+        """Статьи новее since (unix time), сначала самые свежие"""
+        articles = [article for article in self._articles.values() if article.get('timestamp', 0) > since]
+        articles.sort(key=lambda article: article.get('timestamp', 0), reverse=True)
+        return articles
+
+    def search(self, keywords, since=0):
+        """Свежие статьи, где встречается хотя бы одна из фраз keywords (с учетом словоформ), по BM25"""
+        return [
+            article for article in self.index.search_phrases(keywords, since=since)
+            if canonical_url(article.get('url')) in self._articles
+        ]
+
+    def prune(self):
+        """Удаляет статьи старше срока хранения"""
+        cutoff = time.time() - self.retention
+        stale = [key for key, article in self._articles.items() if article.get('timestamp', 0) <= cutoff]
+        for key in stale:
+            del self._articles[key]
+            self.index.remove(key)
+        if self._conn is not None:
+            try:
+                self._conn.execute('DELETE FROM articles WHERE timestamp <= ?', (cutoff,))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Ошибка очистки хранилища статей: {e}")
+        return len(stale)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
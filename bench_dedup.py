@@ -0,0 +1,100 @@
+"""Сравнение попарной проверки дубликатов (is_duplicate_article) с индексом MinHash/LSH.
+
+Запуск: python bench_dedup.py [число_заголовков]
+"""
+import random
+import re
+import sys
+import time
+import urllib.parse
+
+from dedup import NearDuplicateIndex
+
+WORDS = (
+    "банк россии цб эпр регуляторная песочница экспериментальный правовой режим цифровые финансовые "
+    "активы финтех блокчейн минфин госдума закон проект платформа рубль ставка инфляция рынок кредит "
+    "биржа инвестор компания участник решение правительство регион технологии данные сервис оператор"
+).split()
+DOMAINS = ['rbc.ru', 'tass.ru', 'ria.ru', 'vedomosti.ru', 'kommersant.ru', 'iz.ru', 'vc.ru', 'banki.ru']
+
+
+def normalize_title(title):
+    """Копия ImprovedNewsSearcher.normalize_title"""
+    if not title:
+        return ""
+    normalized = title.lower()
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = re.sub(r'[^\w\s]', '', normalized)
+    stop_words = ['новости', 'сегодня', 'сейчас', 'последние', 'свежие']
+    return ' '.join(word for word in normalized.split() if word not in stop_words)
+
+
+def calculate_similarity(text1, text2):
+    if not text1 or not text2:
+        return 0
+    words1, words2 = set(text1.split()), set(text2.split())
+    if not words1 or not words2:
+        return 0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+def is_duplicate_article(article, existing_articles, similarity_threshold=0.8):
+    """Копия текущей попарной реализации"""
+    if not article or not existing_articles:
+        return False
+    new_title = normalize_title(article.get('title', ''))
+    new_domain = urllib.parse.urlparse(article.get('url', '')).netloc
+    for existing in existing_articles:
+        existing_title = normalize_title(existing.get('title', ''))
+        same_domain = urllib.parse.urlparse(existing.get('url', '')).netloc == new_domain
+        if same_domain and calculate_similarity(new_title, existing_title) > similarity_threshold:
+            return True
+        if calculate_similarity(new_title, existing_title) > 0.9:
+            return True
+    return False
+
+
+def build_articles(count, seed=42):
+    rng = random.Random(seed)
+    articles = []
+    for i in range(count):
+        if articles and rng.random() < 0.3:
+            # Почти дубликат: тот же заголовок с мелкими правками, иногда с другого сайта
+            base = rng.choice(articles)
+            words = base['title'].split()
+            if rng.random() < 0.5:
+                words.append(rng.choice(['сегодня', 'новости', str(i)]))
+            domain = urllib.parse.urlparse(base['url']).netloc if rng.random() < 0.6 else rng.choice(DOMAINS)
+            title = ' '.join(words)
+        else:
+            title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))) + f" {i}"
+            domain = rng.choice(DOMAINS)
+        articles.append({'title': title.capitalize(), 'url': f"https://{domain}/news/{i}"})
+    return articles
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    articles = build_articles(count)
+
+    started = time.perf_counter()
+    pairwise = []
+    for article in articles:
+        if not is_duplicate_article(article, pairwise):
+            pairwise.append(article)
+    pairwise_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = NearDuplicateIndex(normalize=normalize_title)
+    indexed = [article for article in articles if index.add_if_new(article)]
+    index_time = time.perf_counter() - started
+
+    same = [a['url'] for a in pairwise] == [a['url'] for a in indexed]
+    print(f"Заголовков: {count}")
+    print(f"Попарно:      {pairwise_time * 1000:9.1f} мс, уникальных {len(pairwise)}")
+    print(f"MinHash/LSH:  {index_time * 1000:9.1f} мс, уникальных {len(indexed)}")
+    print(f"Результаты совпадают: {'да' if same else 'нет'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Замер времени разбора страницы выдачи: полный BeautifulSoup против частичного разбора.
+
+Запуск: python bench_html_parsing.py [путь_к_сохраненной_странице.html]
+Без аргумента используется синтетическая страница ~500 КБ, похожая на выдачу Яндекс.Новостей.
+"""
+import sys
+import time
+from bs4 import BeautifulSoup
+
+import html_parsing
+from html_parsing import make_soup, extract_links, YANDEX_NEWS_CARDS
+
+
+def build_synthetic_page(cards=150, noise_blocks=1500):
+    parts = ['<html><head><title>Яндекс</title></head><body>']
+    for i in range(noise_blocks):
+        parts.append(
+            f'<div class="serp-noise b-{i}"><span>Реклама и навигация {i}</span>'
+            f'<a href="https://yandex.ru/x/{i}">служебная ссылка {i}</a><p>{"текст " * 20}</p></div>'
+        )
+    for i in range(cards):
+        parts.append(
+            f'<article class="mg-card mg-grid__item"><h2 class="mg-card__title">'
+            f'<a class="mg-card__link" href="https://www.rbc.ru/news/{i}">'
+            f'Банк России расширил регуляторную песочницу, новость {i}</a></h2>'
+            f'<div class="mg-card__annotation">{"аннотация " * 15}</div></article>'
+        )
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def bench(name, func, html, repeat=5):
+    func(html)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        found = func(html)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name:<45} {elapsed:8.1f} мс/страница   найдено: {found}")
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            html = f.read()
+    else:
+        html = build_synthetic_page()
+
+    print(f"Размер страницы: {len(html.encode('utf-8')) // 1024} КБ, бэкенд по умолчанию: {html_parsing.HTML_PARSER}\n")
+
+    bench("html.parser, всё дерево + find_all('a')",
+          lambda h: len(BeautifulSoup(h, 'html.parser').find_all('a', href=True)), html)
+    bench("html.parser, всё дерево + карточки",
+          lambda h: len(BeautifulSoup(h, 'html.parser').find_all('article', class_='mg-card')), html)
+    bench(f"{html_parsing.HTML_PARSER}, только карточки (SoupStrainer)",
+          lambda h: len(make_soup(h, parse_only=YANDEX_NEWS_CARDS).find_all('article', class_='mg-card')), html)
+    bench("extract_links" + (" (selectolax)" if html_parsing.SelectolaxParser else " (SoupStrainer)"),
+          lambda h: len(extract_links(h)), html)
+
+    if html_parsing.HTML_PARSER != 'lxml':
+        print("\nlxml не установлен: pip install lxml ускорит разбор еще в несколько раз")
+
+
+if __name__ == "__main__":
+    main()
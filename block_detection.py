@@ -0,0 +1,62 @@
+import re
+import urllib.parse
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Капча, согласие на cookies и блокировки ищутся в начале сырого ответа до разбора HTML:
+# такие страницы небольшие, а нужные маркеры стоят в <head>/<form> в первых килобайтах
+SCAN_BYTES = 64 * 1024
+
+_MARKERS = [
+    ('captcha', [
+        rb'smartcaptcha', rb'showcaptcha', rb'checkcaptcha', rb'captcha\.yandex',
+        'Вы не робот'.encode('utf-8'), 'подтвердите, что запросы отправляли вы'.encode('utf-8'),
+        rb'/sorry/index', rb'unusual traffic from your computer',
+        rb'cf-chl-', rb'anomaly-modal', rb'/challenge/verify',
+    ]),
+    ('consent', [
+        rb'consent\.google\.', rb'consent\.yandex\.', rb'action="https://consent\.',
+    ]),
+    ('blocked', [
+        rb'<title>\s*access denied', rb'<title>\s*403 forbidden', rb'your ip address has been blocked',
+    ]),
+]
+_MARKER_RE = re.compile(
+    b'|'.join(b'(?P<%s>%s)' % (reason.encode(), b'|'.join(markers)) for reason, markers in _MARKERS),
+    re.IGNORECASE
+)
+# Редирект на капчу виден уже по итоговому адресу ответа (смотрим только хост и путь:
+# в параметрах лежит запрос пользователя)
+_URL_MARKERS = (('captcha', ('showcaptcha', '/sorry/', 'captcha')), ('consent', ('consent.',)))
+
+block_counts = Counter()
+
+
+def classify_block_page(body, url=''):
+    """Причина ('captcha', 'consent', 'blocked'), если вместо выдачи пришла служебная страница, иначе None"""
+    try:
+        parsed = urllib.parse.urlsplit(str(url or '').lower())
+        url = parsed.netloc + parsed.path
+    except ValueError:
+        url = ''
+    for reason, markers in _URL_MARKERS:
+        if any(marker in url for marker in markers):
+            return reason
+
+    match = _MARKER_RE.search(body[:SCAN_BYTES])
+    return match.lastgroup if match else None
+
+
+def detect_block_page(engine, body, url=''):
+    """classify_block_page с учетом в счетчиках и логом; возвращает причину или None"""
+    reason = classify_block_page(body, url)
+    if reason:
+        block_counts[(engine, reason)] += 1
+        logger.warning(f"🧱 {engine}: вместо выдачи получена страница '{reason}' ({len(body)} байт)")
+    return reason
+
+
+def block_stats():
+    return {f"{engine}:{reason}": count for (engine, reason), count in block_counts.items()}
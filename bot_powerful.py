@@ -6,6 +6,8 @@ from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from powerful_news_parser import PowerfulNewsParser, SimplePowerfulParser
+from http_client import close_http_client
+from scheduler import PeriodicScheduler
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -235,10 +237,20 @@ async def main():
     except Exception as e:
         logger.error(f"Ошибка при удалении вебхука: {e}")
     
+    # RSS-ленты опрашиваются в фоне, у каждой свой интервал; поиск по RSS читает локальное хранилище
+    scheduler = PeriodicScheduler()
+    scheduler.add_job("rss_ingest", news_parser.ingester.poll_due, interval=30, jitter=0.2)
+    await scheduler.start()
+    
     try:
         await dp.start_polling(bot)
     except Exception as e:
         logger.error(f"Ошибка бота: {e}")
+    finally:
+        await scheduler.stop()
+        logger.info(f"📊 Состояние RSS-лент: {news_parser.feeds.feed_stats()}")
+        news_parser.articles.close()
+        await close_http_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -6,6 +6,7 @@ from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from universal_parser import UniversalParser
+from http_client import close_http_client
 
 load_dotenv()
 
@@ -183,6 +184,8 @@ async def main():
         await dp.start_polling(bot)
     except Exception as e:
         logger.error(f"Ошибка бота: {e}")
+    finally:
+        await close_http_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,214 @@
+import asyncio
+import random
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Причины, после которых поисковик отключается сразу, не дожидаясь доли ошибок
+HARD_FAILURES = frozenset(['captcha', 'consent', 'blocked', 'http_403', 'http_429'])
+
+
+class CircuitBreaker:
+    """Автомат closed/open/half-open для одного поисковика.
+
+    В состоянии closed считается доля неудач среди последних window вызовов
+    (медленный ответ тоже неудача). Превысила failure_rate или пришла капча/429 -
+    автомат размыкается, и поисковик пропускается без запросов. После паузы
+    пропускается один пробный вызов: успех замыкает автомат, неудача снова
+    размыкает его с вдвое большей паузой (до max_backoff).
+
+    Пробный слот выдается allow() и освобождается исходом вызова; если вызывающий
+    упал или был отменен между allow() и health.track, слот считается потерянным
+    через probe_timeout секунд и выдается снова (его подхватывает и probe_due()).
+
+    Каждое размыкание начинает новую эпоху. Исходы вызовов, начатых в прошлой
+    эпохе (до размыкания), и любые исходы в состоянии open игнорируются: запрос,
+    ушедший до капчи, не должен замкнуть автомат сразу после нее.
+    """
+
+    def __init__(self, name, window=20, min_calls=4, failure_rate=0.5, slow_call_seconds=10.0,
+                 base_backoff=30.0, max_backoff=900.0, probe_timeout=60.0):
+        self.name = name
+        self.window = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.backoff = 0.0
+        self.consecutive_opens = 0
+        self.last_reason = None
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.skipped = 0
+        self.epoch = 0
+
+    def _reopen_at(self):
+        return self.opened_at + self.backoff
+
+    def _probe_lost(self):
+        return self._probe_in_flight and time.monotonic() - self._probe_started > self.probe_timeout
+
+    def allow(self):
+        """Можно ли сейчас обращаться к поисковику"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self._reopen_at():
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN and (not self._probe_in_flight or self._probe_lost()):
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+            logger.info(f"🩺 {self.name}: пробный запрос после паузы {self.backoff:.0f} с")
+            return True
+        self.skipped += 1
+        return False
+
+    def probe_due(self):
+        """Пора ли проверить отключенный поисковик пробным запросом"""
+        if self.state == HALF_OPEN:
+            return self._probe_lost()
+        return self.state == OPEN and time.monotonic() >= self._reopen_at()
+
+    def _is_stale(self, epoch):
+        return self.state == OPEN or (epoch is not None and epoch != self.epoch)
+
+    def release(self, epoch=None):
+        """Вызов прерван без результата (отмена): освобождаем пробный слот"""
+        if not self._is_stale(epoch):
+            self._probe_in_flight = False
+
+    def record_success(self, latency, epoch=None):
+        if self._is_stale(epoch):
+            return
+        if latency > self.slow_call_seconds:
+            self.record_failure('slow', epoch)
+            return
+
+        if self.state != CLOSED:
+            logger.info(f"✅ {self.name}: поисковик снова доступен")
+        self.state = CLOSED
+        self.consecutive_opens = 0
+        self._probe_in_flight = False
+        self.window.append(True)
+
+    def record_failure(self, reason, epoch=None):
+        if self._is_stale(epoch):
+            return
+        self.last_reason = reason
+        self.window.append(False)
+
+        if self.state == HALF_OPEN:
+            self._open(reason)
+        elif self.state == CLOSED:
+            failures = self.window.count(False)
+            if reason in HARD_FAILURES or (
+                    len(self.window) >= self.min_calls and failures / len(self.window) >= self.failure_rate):
+                self._open(reason)
+
+    def _open(self, reason):
+        self.epoch += 1
+        self.consecutive_opens += 1
+        backoff = min(self.base_backoff * 2 ** (self.consecutive_opens - 1), self.max_backoff)
+        # Разброс, чтобы пробы разных поисковиков не совпадали
+        self.backoff = backoff * random.uniform(0.9, 1.1)
+        self.opened_at = time.monotonic()
+        self.state = OPEN
+        self._probe_in_flight = False
+        self.window.clear()
+        logger.warning(f"🚫 {self.name}: отключен на {self.backoff:.0f} с (причина: {reason})")
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'last_reason': self.last_reason,
+            'backoff': round(self.backoff, 1),
+            'skipped': self.skipped,
+        }
+
+
+class EngineCall:
+    """Исход одного обращения к поисковику внутри EngineHealth.track"""
+
+    def __init__(self):
+        self.reason = None
+        self.started = time.monotonic()
+        self.ignored = False
+        self._timer_started = False
+
+    def fail(self, reason):
+        self.reason = reason
+
+    def ignore(self):
+        """Отмененный вызов не учитывать (например, запрос так и не дождался соединения)"""
+        self.ignored = True
+
+    def start_timer(self):
+        """Отсчитывать задержку с этого момента (например, после ожидания слота хоста), только первый раз"""
+        if not self._timer_started:
+            self._timer_started = True
+            self.started = time.monotonic()
+
+
+class EngineHealth:
+    """Автоматы по всем поисковикам одного поисковика новостей"""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers = {}
+
+    def breaker(self, name):
+        if name not in self._breakers:
+            self._breakers[name] = CircuitBreaker(name, **self.breaker_options)
+        return self._breakers[name]
+
+    def allow(self, name):
+        return self.breaker(name).allow()
+
+    @contextmanager
+    def track(self, name):
+        """Учитывает исход вызова: исключение или call.fail(причина) - неудача, иначе успех с задержкой.
+        Если перед исключением вызван call.fail, в автомат пишется его причина, в том числе при отмене"""
+        breaker = self.breaker(name)
+        call = EngineCall()
+        epoch = breaker.epoch
+        try:
+            yield call
+        except asyncio.TimeoutError:
+            breaker.record_failure('timeout', epoch)
+            raise
+        except asyncio.CancelledError:
+            # Отмена по общему бюджету поиска после долгого ожидания - тоже признак деградации
+            if call.ignored:
+                breaker.release(epoch)
+            elif call.reason:
+                breaker.record_failure(call.reason, epoch)
+            elif time.monotonic() - call.started > breaker.slow_call_seconds:
+                breaker.record_failure('slow', epoch)
+            else:
+                breaker.release(epoch)
+            raise
+        except Exception as e:
+            breaker.record_failure(call.reason or type(e).__name__, epoch)
+            raise
+        if call.reason:
+            breaker.record_failure(call.reason, epoch)
+        else:
+            breaker.record_success(time.monotonic() - call.started, epoch)
+
+    def due_for_probe(self):
+        return [name for name, breaker in self._breakers.items() if breaker.probe_due()]
+
+    def stats(self):
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
@@ -0,0 +1,69 @@
+import asyncio
+import gzip
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+import logging
+
+from search_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class DebugCapture:
+    """Сохранение выборки ответов поисковиков для отладки парсеров.
+
+    По умолчанию выключено. Включается переменной DEBUG_CAPTURE=1; файлы пишутся
+    в фоне в сжатом виде, на диске хранится не больше max_files последних ответов.
+    """
+
+    def __init__(self, enabled=None, directory=None, sample_rate=None, max_files=None):
+        self.enabled = enabled if enabled is not None else os.getenv('DEBUG_CAPTURE', '0') == '1'
+        self.directory = directory or os.getenv('DEBUG_CAPTURE_DIR', 'debug_captures')
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('DEBUG_CAPTURE_SAMPLE', '0.1'))
+        self.max_files = max_files or int(os.getenv('DEBUG_CAPTURE_MAX_FILES', '20'))
+        self._files = deque()
+        self._files_lock = threading.Lock()
+        self._tasks = set()
+
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            existing = sorted(
+                (os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.gz')),
+                key=os.path.getmtime
+            )
+            self._files.extend(existing)
+            logger.info(f"🐞 Отладочное сохранение ответов включено: {self.directory}, доля {self.sample_rate}")
+
+    def capture(self, engine, query, body):
+        """Ставит ответ в очередь на сохранение, если он попал в выборку"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+
+        engine_slug = re.sub(r'[^\w-]+', '_', engine)
+        query_key = make_cache_key(query, engine_slug).split(':', 1)[1]
+        path = os.path.join(self.directory, f"{engine_slug}_{query_key}_{int(time.time() * 1000)}.html.gz")
+
+        task = asyncio.create_task(asyncio.to_thread(self._write, path, body))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _write(self, path, body):
+        try:
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            with gzip.open(path, 'wb', compresslevel=5) as f:
+                f.write(data)
+
+            with self._files_lock:
+                self._files.append(path)
+                while len(self._files) > self.max_files:
+                    old_path = self._files.popleft()
+                    try:
+                        os.remove(old_path)
+                    except FileNotFoundError:
+                        pass
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось сохранить отладочный ответ {path}: {e}")
@@ -0,0 +1,116 @@
+import random
+import urllib.parse
+import zlib
+import logging
+
+from text_normalize import normalize_title
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class NearDuplicateIndex:
+    """Индекс почти одинаковых заголовков: MinHash по словам + LSH-таблица по полосам.
+
+    Поведение совпадает с попарным сравнением is_duplicate_article: дубликат, если
+    сходство слов заголовков > same_domain_threshold на том же домене или
+    > global_threshold на любом. LSH лишь отбирает кандидатов, итоговое решение
+    принимается по точному коэффициенту Жаккара, поэтому вставка занимает почти
+    постоянное время вместо прохода по всем статьям.
+    """
+
+    def __init__(self, normalize=None, num_perm=64, bands=16, same_domain_threshold=0.8, global_threshold=0.9, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm должен делиться на bands")
+        self.normalize = normalize or normalize_title
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.same_domain_threshold = same_domain_threshold
+        self.global_threshold = global_threshold
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+        self._buckets = [{} for _ in range(bands)]
+        self._items = []  # (множество слов, домен)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _signature(self, words):
+        hashes = [zlib.crc32(word.encode('utf-8')) for word in words]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[i * rows:(i + 1) * rows]) for i in range(self.bands)]
+
+    @staticmethod
+    def _domain(url):
+        try:
+            return urllib.parse.urlparse(url or '').netloc
+        except ValueError:
+            return ''
+
+    @staticmethod
+    def _jaccard(words1, words2):
+        union = len(words1 | words2)
+        return len(words1 & words2) / union if union else 0
+
+    def _prepare(self, article):
+        words = frozenset(self.normalize(article.get('title', '')).split())
+        return words, self._domain(article.get('url', ''))
+
+    def _find_duplicate(self, words, domain, band_keys):
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        for item_id in candidates:
+            other_words, other_domain = self._items[item_id]
+            similarity = self._jaccard(words, other_words)
+            if similarity > self.global_threshold:
+                return True
+            if domain == other_domain and similarity > self.same_domain_threshold:
+                return True
+        return False
+
+    def is_duplicate(self, article):
+        words, domain = self._prepare(article)
+        if not words:
+            return False
+        return self._find_duplicate(words, domain, self._band_keys(self._signature(words)))
+
+    def add(self, article):
+        """Добавляет статью в индекс без проверки"""
+        words, domain = self._prepare(article)
+        if words:
+            self._insert(words, domain, self._band_keys(self._signature(words)))
+
+    def add_if_new(self, article):
+        """Добавляет статью, если она не дубликат уже добавленных; возвращает True, если добавлена"""
+        if not article:
+            return False
+        words, domain = self._prepare(article)
+        if not words:
+            return True
+
+        band_keys = self._band_keys(self._signature(words))
+        if self._find_duplicate(words, domain, band_keys):
+            return False
+        self._insert(words, domain, band_keys)
+        return True
+
+    def _insert(self, words, domain, band_keys):
+        item_id = len(self._items)
+        self._items.append((words, domain))
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(item_id)
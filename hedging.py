@@ -0,0 +1,100 @@
+import asyncio
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Скользящие задержки ответов по ключу (зеркалу) и порядок ключей по p90"""
+
+    def __init__(self, window=50, default=2.0, failure_penalty=30.0):
+        self.window = window
+        self.default = default
+        self.failure_penalty = failure_penalty
+        self._samples = {}
+
+    def record(self, key, seconds):
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def record_failure(self, key):
+        # Ошибка считается очень медленным ответом, чтобы зеркало уехало в конец очереди
+        self.record(key, self.failure_penalty)
+
+    def p90(self, key):
+        samples = self._samples.get(key)
+        if not samples:
+            return self.default
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def order(self, keys):
+        """Ключи от самого быстрого к самому медленному (при равенстве - в исходном порядке)"""
+        return sorted(keys, key=self.p90)
+
+    def stats(self):
+        return {key: round(self.p90(key), 3) for key in self._samples}
+
+
+async def hedged_first(candidates, fetch, tracker, key=None, min_delay=0.3, max_delay=5.0):
+    """Запрос с подстраховкой: первый хороший ответ из нескольких равноценных источников.
+
+    Кандидаты опрашиваются от самого быстрого по p90. Следующий запускается, если
+    текущий не ответил за свой p90 (в пределах min_delay..max_delay) или ответил
+    неудачей. fetch(кандидат) возвращает результат; исключение или пустой результат
+    считаются неудачей. Первый хороший ответ отменяет остальные запросы.
+    Возвращает (кандидат, результат) или (None, None), если не ответил никто.
+    """
+    key = key or (lambda candidate: candidate)
+    queue = deque(sorted(candidates, key=lambda candidate: tracker.p90(key(candidate))))
+    running = {}
+
+    async def timed(candidate):
+        started = time.monotonic()
+        try:
+            result = await fetch(candidate)
+        except asyncio.CancelledError:
+            # Проигравший запрос отвечал как минимум столько - учитываем, чтобы зеркало опустилось в очереди
+            tracker.record(key(candidate), time.monotonic() - started)
+            raise
+        except Exception:
+            tracker.record_failure(key(candidate))
+            raise
+        tracker.record(key(candidate), time.monotonic() - started)
+        return result
+
+    def launch():
+        candidate = queue.popleft()
+        running[asyncio.ensure_future(timed(candidate))] = candidate
+        return candidate
+
+    try:
+        launch()
+        while running:
+            delay = None
+            if queue:
+                newest = list(running.values())[-1]
+                delay = min(max(tracker.p90(key(newest)), min_delay), max_delay)
+
+            done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedge = launch()
+                logger.info(f"🛡️ Нет ответа за {delay:.1f} с, параллельно пробуем {key(hedge)}")
+                continue
+
+            for task in done:
+                candidate = running.pop(task)
+                if task.exception() is not None:
+                    logger.warning(f"⚠️ {key(candidate)}: {task.exception()}")
+                elif task.result():
+                    return candidate, task.result()
+                # Неудачу не ждем до конца задержки: сразу пробуем следующего
+                if queue:
+                    launch()
+        return None, None
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
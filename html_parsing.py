@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ===== ВЫБОР БЭКЕНДА ПАРСИНГА =====
+# lxml быстрее встроенного html.parser в несколько раз, но это необязательная зависимость
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+HTML_PARSER = os.getenv('HTML_PARSER_BACKEND', HTML_PARSER)
+
+# selectolax используется только для быстрого извлечения всех ссылок со страницы
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+
+def _classes(value):
+    """Список классов элемента: при parse_only bs4 отдает атрибут class одной строкой"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return value.split()
+    return list(value)
+
+
+def _has_class(wanted):
+    """Сравнение с одним из классов элемента, а не со всей строкой class="a b" """
+    return lambda value: wanted in _classes(value)
+
+
+def _is_bing_news_card(name, attrs):
+    if name == 'article':
+        return True
+    if name != 'div':
+        return False
+    classes = _classes(attrs.get('class'))
+    return 'news-card' in classes or 'tile' in classes
+
+
+# ===== ОГРАНИЧЕНИЕ РАЗБОРА ОБЛАСТЬЮ РЕЗУЛЬТАТОВ =====
+LINKS = SoupStrainer('a', href=True)
+YANDEX_NEWS_CARDS = SoupStrainer('article', class_=_has_class('mg-card'))
+BING_NEWS_CARDS = SoupStrainer(_is_bing_news_card)
+GOOGLE_NEWS_ARTICLES = SoupStrainer('article')
+DUCKDUCKGO_RESULTS = SoupStrainer('div', class_=_has_class('result'))
+
+
+def make_soup(html, parse_only=None):
+    """BeautifulSoup на самом быстром доступном парсере, при необходимости только по части страницы"""
+    return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+
+
+def extract_links(html):
+    """Все ссылки страницы в виде списка (href, текст)"""
+    if SelectolaxParser is not None:
+        tree = SelectolaxParser(html)
+        return [
+            (node.attributes.get('href') or '', node.text(separator=' ').strip())
+            for node in tree.css('a[href]')
+        ]
+
+    soup = make_soup(html, parse_only=LINKS)
+    return [(link.get('href', ''), link.get_text().strip()) for link in soup.find_all('a', href=True)]
+
+
+# ===== ПУЛ ПОТОКОВ ДЛЯ РАЗБОРА =====
+# Разбор HTML/XML выполняется вне event loop, чтобы polling и /health не замирали
+_parse_executor = None
+
+
+def get_parse_executor():
+    """Ограниченный пул потоков для разбора, размер задается PARSE_WORKERS"""
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('PARSE_WORKERS', '2')),
+            thread_name_prefix='parser'
+        )
+    return _parse_executor
+
+
+async def run_in_parser_pool(func, *args, **kwargs):
+    """Выполняет синхронную функцию разбора в пуле и возвращает ее результат"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_parse_executor():
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
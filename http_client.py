@@ -0,0 +1,103 @@
+import asyncio
+import os
+import aiohttp
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _ClosingResponse(aiohttp.ClientResponse):
+    """Брошенный до конца ответ закрывает соединение, а не возвращает его в пул.
+
+    aiohttp 3.9.0 при отмене или таймауте запроса до заголовков ответа вызывает
+    close(), который отпускает соединение в пул как свободное, хотя сервер еще
+    отвечает на брошенный запрос. Следующий запрос к тому же хосту получает это
+    соединение и ждет чужой ответ.
+    """
+
+    def close(self):
+        if self.connection is not None and self.connection.protocol is not None:
+            self.connection.protocol.force_close()
+        super().close()
+
+
+class RequestProgress:
+    """Передается в запрос как trace_request_ctx: connected становится True,
+    когда запрос дождался соединения из пула (новое или keep-alive)"""
+
+    def __init__(self):
+        self.connected = False
+
+
+async def _on_connection(session, trace_config_ctx, params):
+    progress = trace_config_ctx.trace_request_ctx
+    if isinstance(progress, RequestProgress):
+        progress.connected = True
+
+
+def _progress_trace():
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(_on_connection)
+    trace.on_connection_reuseconn.append(_on_connection)
+    return trace
+
+
+class HttpClient:
+    """Общий aiohttp-клиент: один пул соединений, DNS-кэш и keep-alive для всех поисковиков"""
+
+    def __init__(self, limit=100, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30,
+                 total_timeout=30, connect_timeout=10, read_timeout=20):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout, sock_read=read_timeout)
+        self._session = None
+        self._loop = None
+
+    async def get_session(self):
+        loop = asyncio.get_running_loop()
+        # После asyncio.run() в цикле перезапусков старая сессия привязана к закрытому loop
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(timeout=self.timeout, connector=connector,
+                                                  response_class=_ClosingResponse,
+                                                  trace_configs=[_progress_trace()])
+            self._loop = loop
+            logger.info(f"🌐 HTTP-пул создан (limit={self.limit}, per_host={self.limit_per_host})")
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+            # Даем SSL-соединениям корректно закрыться
+            await asyncio.sleep(0.25)
+            logger.info("✅ HTTP-пул закрыт")
+        self._session = None
+        self._loop = None
+
+
+_shared_client = None
+
+
+def get_http_client():
+    """HTTP-клиент процесса, лимиты настраиваются через HTTP_POOL_LIMIT и HTTP_POOL_PER_HOST"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClient(
+            limit=int(os.getenv('HTTP_POOL_LIMIT', '100')),
+            limit_per_host=int(os.getenv('HTTP_POOL_PER_HOST', '8'))
+        )
+    return _shared_client
+
+
+async def close_http_client():
+    if _shared_client is not None:
+        await _shared_client.close()
@@ -0,0 +1,101 @@
+import re
+from collections import OrderedDict
+
+
+def _fold(text):
+    return (text or '').lower().replace('ё', 'е')
+
+
+def _trie_pattern(patterns):
+    """Регулярное выражение-дерево по общим префиксам: "правовой (?:режим|эксперимент)".
+
+    На каждой позиции движок re проходит дерево один раз и отсекает ветку на первом
+    несовпавшем символе, а не сравнивает текст с каждым словом по очереди. Из вариантов
+    выбирается самое длинное слово, начинающееся в этой позиции.
+    """
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """Набор ключевых слов, скомпилированный один раз в однопроходный поиск по тексту.
+
+    Ключевые слова и текст сравниваются без учета регистра (ё = е). find() за один
+    проход находит все ключевые слова, включая перекрывающиеся ("правовой режим"
+    внутри "экспериментальный правовой режим"), и возвращает их в исходном написании;
+    matches() останавливается на первом совпадении. Наборы с дополнительными словами
+    (with_extra) кэшируются, так что запрос пользователя не пересобирает поиск.
+    """
+
+    max_extended = 256
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keyword.strip() for keyword in keywords if keyword and keyword.strip()))
+        self._originals = {}
+        for keyword in self.keywords:
+            self._originals.setdefault(_fold(keyword), keyword)
+        self._order = {pattern: i for i, pattern in enumerate(self._originals)}
+
+        # Найденное самое длинное слово дает и все ключевые слова, которые в него входят
+        self._contained = {
+            pattern: [other for other in self._originals if other in pattern]
+            for pattern in self._originals
+        }
+        if self._originals:
+            trie = _trie_pattern(self._originals)
+            self._search_re = re.compile(trie)
+            self._find_re = re.compile(f'(?=({trie}))')
+        else:
+            self._search_re = self._find_re = None
+        self._extended = OrderedDict()
+
+    def __len__(self):
+        return len(self._originals)
+
+    def with_extra(self, *keywords):
+        """Набор с дополнительными словами (например, запросом пользователя); собирается один раз на слова"""
+        key = tuple(_fold(keyword).strip() for keyword in keywords)
+        matcher = self._extended.get(key)
+        if matcher is None:
+            matcher = KeywordMatcher(self.keywords + list(keywords))
+            self._extended[key] = matcher
+            if len(self._extended) > self.max_extended:
+                self._extended.popitem(last=False)
+        else:
+            self._extended.move_to_end(key)
+        return matcher
+
+    def find(self, text):
+        """Ключевые слова, которые встречаются в тексте, в порядке набора"""
+        if self._find_re is None:
+            return []
+        found = set()
+        for match in self._find_re.finditer(_fold(text)):
+            found.update(self._contained[match.group(1)])
+        return [self._originals[pattern] for pattern in sorted(found, key=self._order.__getitem__)]
+
+    def matches(self, text):
+        return self._search_re is not None and self._search_re.search(_fold(text)) is not None
+
+    def rank(self, articles, boost=3600):
+        """Сортирует статьи от свежих к старым, каждое совпавшее ключевое слово
+        в заголовке или описании добавляет статье boost секунд свежести"""
+        def score(article):
+            found = self.find(f"{article.get('title', '')} {article.get('description', '')}")
+            return article.get('timestamp', 0) + boost * len(found)
+
+        articles.sort(key=score, reverse=True)
+        return articles
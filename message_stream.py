@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+import logging
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_TEXT_LIMIT = 4096
+
+
+class StreamingReply:
+    """Одно сообщение бота, которое дописывается по мере прихода результатов.
+
+    Telegram ограничивает частоту правок одного чата, поэтому промежуточные
+    тексты правятся не чаще min_interval: если новый текст пришел раньше,
+    он откладывается, а в сообщение попадает только последний из отложенных.
+    """
+
+    def __init__(self, message, reply=None, min_interval=None):
+        self.message = message  # сообщение пользователя, на которое отвечаем
+        self.reply = reply  # уже отправленное сообщение бота ("🔍 Ищу..."), которое будем править
+        self.min_interval = float(os.getenv('STREAM_EDIT_INTERVAL', '1.5')) if min_interval is None else min_interval
+        self._text = reply.text if reply is not None else None
+        self._pending = None
+        self._flush_task = None
+        self._last_edit = 0.0
+        self._lock = asyncio.Lock()
+
+    async def update(self, text):
+        """Промежуточный текст: показывается сразу или по истечении интервала между правками"""
+        self._pending = text
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def finish(self, text):
+        """Итоговый текст: отменяет отложенные правки и показывается обязательно"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._pending = None
+        await self._show(text, final=True)
+
+    async def _flush_later(self):
+        await asyncio.sleep(max(0.0, self._last_edit + self.min_interval - time.monotonic()))
+        text, self._pending = self._pending, None
+        if text is not None:
+            await self._show(text)
+
+    async def _show(self, text, final=False):
+        text = text[:TELEGRAM_TEXT_LIMIT]
+        async with self._lock:
+            if text == self._text:
+                return
+            wait = self._last_edit + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            for attempt in range(2):
+                try:
+                    if self.reply is None:
+                        self.reply = await self.message.answer(text)
+                    else:
+                        await self.reply.edit_text(text)
+                    break
+                except TelegramRetryAfter as e:
+                    # Промежуточную правку при флуд-контроле пропускаем, итоговую повторяем
+                    logger.warning(f"⏳ Telegram просит подождать {e.retry_after} с перед правкой сообщения")
+                    if not final or attempt:
+                        return
+                    await asyncio.sleep(e.retry_after)
+                except TelegramBadRequest as e:
+                    if 'message is not modified' in str(e):
+                        break
+                    logger.warning(f"⚠️ Не удалось изменить сообщение: {e}")
+                    if not final:
+                        return
+                    # Сообщение удалено или слишком старое: итог отправляем отдельным сообщением
+                    self.reply = await self.message.answer(text)
+                    break
+
+            self._text = text
+            self._last_edit = time.monotonic()
@@ -35,26 +35,38 @@ main_keyboard = ReplyKeyboardMarkup(
 )
 
 class FastSearcher:
-    def __init__(self):
+    def __init__(self, session=None):
         self.timeout = aiohttp.ClientTimeout(total=10)
+        self.session = session
+
+    async def get_session(self):
+        """Одна сессия на все запросы вместо новой на каждый вызов"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=4, ttl_dns_cache=300, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(timeout=self.timeout, connector=connector)
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
         
     async def search_duckduckgo(self, query):
         """Быстрый поиск через DuckDuckGo Instant Answer API"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                url = f"https://api.duckduckgo.com/"
-                params = {
-                    'q': query,
-                    'format': 'json',
-                    'no_html': '1',
-                    'skip_disambig': '1'
-                }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_duckduckgo(data, query)
-                    return []
+            session = await self.get_session()
+            url = f"https://api.duckduckgo.com/"
+            params = {
+                'q': query,
+                'format': 'json',
+                'no_html': '1',
+                'skip_disambig': '1'
+            }
+            
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return self._parse_duckduckgo(data, query)
+                return []
         except asyncio.TimeoutError:
             logger.warning("DuckDuckGo timeout")
             return []
@@ -326,7 +338,10 @@ async def handle_text(message: types.Message):
 async def main():
     logger.info("🚀 Быстрый бот запускается...")
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await fast_searcher.close()
 
 if __name__ == "__main__":
     import asyncio
@@ -369,26 +384,38 @@ main_keyboard = ReplyKeyboardMarkup(
 )
 
 class FastSearcher:
-    def __init__(self):
+    def __init__(self, session=None):
         self.timeout = aiohttp.ClientTimeout(total=10)
+        self.session = session
+
+    async def get_session(self):
+        """Одна сессия на все запросы вместо новой на каждый вызов"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=4, ttl_dns_cache=300, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(timeout=self.timeout, connector=connector)
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
         
     async def search_duckduckgo(self, query):
         """Быстрый поиск через DuckDuckGo Instant Answer API"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                url = f"https://api.duckduckgo.com/"
-                params = {
-                    'q': query,
-                    'format': 'json',
-                    'no_html': '1',
-                    'skip_disambig': '1'
-                }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_duckduckgo(data, query)
-                    return []
+            session = await self.get_session()
+            url = f"https://api.duckduckgo.com/"
+            params = {
+                'q': query,
+                'format': 'json',
+                'no_html': '1',
+                'skip_disambig': '1'
+            }
+            
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return self._parse_duckduckgo(data, query)
+                return []
         except asyncio.TimeoutError:
             logger.warning("DuckDuckGo timeout")
             return []
@@ -660,7 +687,10 @@ async def handle_text(message: types.Message):
 async def main():
     logger.info("🚀 Быстрый бот запускается...")
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await fast_searcher.close()
 
 if __name__ == "__main__":
     import asyncio
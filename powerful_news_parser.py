@@ -1,23 +1,33 @@
-import aiohttp
 import asyncio
+import os
 import requests
-from bs4 import BeautifulSoup
 import feedparser
-import re
-import json
 from datetime import datetime, timedelta
 from dateutil import parser as date_parser
 from telethon import TelegramClient
-from telethon.tl.types import Message, Channel
 import time
 from config import Config
+from http_client import get_http_client
+from html_parsing import run_in_parser_pool
+from text_normalize import normalize_title
+from url_canon import CanonicalUrlIndex
+from rss_fetcher import ConditionalFeedFetcher
+from article_store import ArticleStore
+from rss_ingester import RssIngester
+from keyword_matcher import KeywordMatcher
 import logging
 
 logger = logging.getLogger(__name__)
 
 class PowerfulNewsParser:
-    def __init__(self):
+    def __init__(self, http_client=None):
         self.config = Config()
+        self.keywords = KeywordMatcher(self.config.KEYWORDS)
+        self.http = http_client or get_http_client()
+        self.feeds = ConditionalFeedFetcher(self.http)
+        # Ленты опрашиваются в фоне (ingester.poll_due по таймеру), поиск идет по локальному хранилищу
+        self.articles = ArticleStore(os.getenv('ARTICLE_STORE_DB'), retention_days=int(os.getenv('ARTICLE_RETENTION_DAYS', '7')))
+        self.ingester = RssIngester(self.feeds, self.articles, self.config.RSS_SOURCES)
         self.telegram_client = None
         self.setup_telegram()
     
@@ -58,8 +68,8 @@ class PowerfulNewsParser:
         social_results = await self.search_social_media(query)
         results.extend(social_results)
         
-        # Сортируем по дате (сначала самые свежие)
-        results.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
+        # Сначала самые свежие, совпадения с ключевыми словами поднимают статью выше
+        self.keywords.with_extra(query).rank(results)
         
         return self.remove_duplicates(results)[:20]
     
@@ -74,6 +84,7 @@ class PowerfulNewsParser:
             await self.telegram_client.start()
             
             since_date = datetime.now() - timedelta(hours=hours_back)
+            keywords = self.keywords.with_extra(query)
             
             for channel in self.config.TELEGRAM_CHANNELS:
                 try:
@@ -88,14 +99,14 @@ class PowerfulNewsParser:
                         search=query
                     ):
                         if message.text:
-                            content = message.text.lower()
-                            if any(keyword in content for keyword in self.config.KEYWORDS + [query.lower()]):
+                            found = keywords.find(message.text)
+                            if found:
                                 results.append({
                                     'title': message.text[:100] + '...' if len(message.text) > 100 else message.text,
                                     'url': f"https://t.me/{channel}/{message.id}",
                                     'source': f"Telegram: {channel}",
                                     'description': message.text[:200] + '...' if len(message.text) > 200 else message.text,
-                                    'keywords': [query],
+                                    'keywords': found,
                                     'date': message.date.strftime("%Y-%m-%d %H:%M"),
                                     'timestamp': message.date.timestamp()
                                 })
@@ -118,26 +129,26 @@ class PowerfulNewsParser:
             # Используем Google News RSS с поиском
             search_url = f"https://news.google.com/rss/search?q={requests.utils.quote(query)}+Россия&hl=ru&gl=RU&ceid=RU:ru"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries[:15]:
-                            try:
-                                pub_date = date_parser.parse(entry.published)
-                                results.append({
-                                    'title': entry.title,
-                                    'url': entry.link,
-                                    'source': 'Google News: ' + entry.get('source', {}).get('title', 'Unknown'),
-                                    'description': entry.get('description', '')[:200] + '...',
-                                    'keywords': [query],
-                                    'date': pub_date.strftime("%Y-%m-%d %H:%M"),
-                                    'timestamp': pub_date.timestamp()
-                                })
-                            except:
-                                continue
+            session = await self.http.get_session()
+            async with session.get(search_url, timeout=10) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    feed = await run_in_parser_pool(feedparser.parse, content)
+                    
+                    for entry in feed.entries[:15]:
+                        try:
+                            pub_date = date_parser.parse(entry.published)
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': 'Google News: ' + entry.get('source', {}).get('title', 'Unknown'),
+                                'description': entry.get('description', '')[:200] + '...',
+                                'keywords': [query],
+                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': pub_date.timestamp()
+                            })
+                        except:
+                            continue
         except Exception as e:
             logger.error(f"Google News search error: {e}")
         
@@ -157,63 +168,71 @@ class PowerfulNewsParser:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, headers=headers, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries[:10]:
-                            try:
-                                pub_date = date_parser.parse(entry.published)
-                                results.append({
-                                    'title': entry.title,
-                                    'url': entry.link,
-                                    'source': 'Яндекс.Новости',
-                                    'description': entry.get('description', '')[:200] + '...',
-                                    'keywords': [query],
-                                    'date': pub_date.strftime("%Y-%m-%d %H:%M"),
-                                    'timestamp': pub_date.timestamp()
-                                })
-                            except:
-                                continue
+            session = await self.http.get_session()
+            async with session.get(url, params=params, headers=headers, timeout=10) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    feed = await run_in_parser_pool(feedparser.parse, content)
+                    
+                    for entry in feed.entries[:10]:
+                        try:
+                            pub_date = date_parser.parse(entry.published)
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': 'Яндекс.Новости',
+                                'description': entry.get('description', '')[:200] + '...',
+                                'keywords': [query],
+                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': pub_date.timestamp()
+                            })
+                        except:
+                            continue
         except Exception as e:
             logger.error(f"Yandex News search error: {e}")
         
         return results
     
+    def _search_article_store(self, query, hours_back):
+        """Поиск по статьям, которые RssIngester уже собрал из лент"""
+        since = time.time() - hours_back * 3600
+        keywords = self.keywords.with_extra(query)
+        articles = self.articles.search(keywords.keywords, since=since)
+        return [
+            dict(article, keywords=keywords.find(f"{article['title']} {article.get('description', '')}") or [query])
+            for article in articles
+        ]
+
     async def search_rss_realtime(self, query, hours_back=24):
         """Поиск в RSS лентах в реальном времени"""
+        if self.ingester.ready:
+            return self._search_article_store(query, hours_back)
+
+        # Фоновый опрос еще не прошел по всем лентам - читаем их напрямую
         results = []
+        keywords = self.keywords.with_extra(query)
         
-        async with aiohttp.ClientSession() as session:
-            for rss_url in self.config.RSS_SOURCES:
+        # Ленты грузятся параллельно с общим сроком: мертвая лента не задерживает остальные
+        feeds = await self.feeds.fetch_many(self.config.RSS_SOURCES, timeout=10)
+        for rss_url, entries in feeds.items():
+            for entry in entries[:10]:
                 try:
-                    async with session.get(rss_url, timeout=10) as response:
-                        if response.status == 200:
-                            content = await response.text()
-                            feed = feedparser.parse(content)
-                            
-                            for entry in feed.entries[:10]:
-                                try:
-                                    pub_date = date_parser.parse(entry.published)
-                                    # Проверяем что новость свежая
-                                    if datetime.now() - pub_date < timedelta(hours=hours_back):
-                                        content_text = f"{entry.title} {entry.get('description', '')}".lower()
-                                        if any(keyword in content_text for keyword in self.config.KEYWORDS + [query.lower()]):
-                                            results.append({
-                                                'title': entry.title,
-                                                'url': entry.link,
-                                                'source': f"RSS: {rss_url.split('/')[2]}",
-                                                'description': entry.get('description', '')[:150] + '...',
-                                                'keywords': [query],
-                                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
-                                                'timestamp': pub_date.timestamp()
-                                            })
-                                except:
-                                    continue
-                except Exception as e:
-                    logger.warning(f"RSS feed {rss_url} error: {e}")
+                    pub_date = date_parser.parse(entry.published)
+                    # Проверяем что новость свежая
+                    if datetime.now() - pub_date < timedelta(hours=hours_back):
+                        found = keywords.find(f"{entry.title} {entry.get('description', '')}")
+                        if found:
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': f"RSS: {rss_url.split('/')[2]}",
+                                'description': entry.get('description', '')[:150] + '...',
+                                'keywords': found,
+                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': pub_date.timestamp()
+                            })
+                except:
+                    continue
         
         return results
     
@@ -230,21 +249,21 @@ class PowerfulNewsParser:
                 'v': '5.131'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(vk_url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'response' in data:
-                            for item in data['response'].get('items', [])[:5]:
-                                results.append({
-                                    'title': f"VK: {item.get('text', '')[:50]}...",
-                                    'url': f"https://vk.com/wall{item.get('owner_id')}_{item.get('id')}",
-                                    'source': 'VKontakte',
-                                    'description': item.get('text', '')[:100] + '...',
-                                    'keywords': [query],
-                                    'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
-                                    'timestamp': datetime.now().timestamp()
-                                })
+            session = await self.http.get_session()
+            async with session.get(vk_url, params=params, timeout=10) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if 'response' in data:
+                        for item in data['response'].get('items', [])[:5]:
+                            results.append({
+                                'title': f"VK: {item.get('text', '')[:50]}...",
+                                'url': f"https://vk.com/wall{item.get('owner_id')}_{item.get('id')}",
+                                'source': 'VKontakte',
+                                'description': item.get('text', '')[:100] + '...',
+                                'keywords': [query],
+                                'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': datetime.now().timestamp()
+                            })
         except Exception as e:
             logger.warning(f"VK search error: {e}")
         
@@ -252,16 +271,16 @@ class PowerfulNewsParser:
     
     def remove_duplicates(self, results):
         """Удаление дубликатов по URL и заголовку"""
-        seen_urls = set()
+        seen_urls = CanonicalUrlIndex()
         seen_titles = set()
         unique_results = []
         
         for result in results:
             url = result['url']
-            title = result['title'][:50]  # Берем первую часть заголовка для сравнения
+            title = normalize_title(result['title'])[:50]  # Берем первую часть заголовка для сравнения
             
             if url not in seen_urls and title not in seen_titles:
-                seen_urls.add(url)
+                seen_urls.add_if_new(url)
                 seen_titles.add(title)
                 unique_results.append(result)
         
@@ -288,8 +307,23 @@ class PowerfulNewsParser:
 
 # Упрощенная версия без Telegram (если нет API keys)
 class SimplePowerfulParser:
-    def __init__(self):
+    def __init__(self, http_client=None):
         self.config = Config()
+        self.keywords = KeywordMatcher(self.config.KEYWORDS)
+        self.http = http_client or get_http_client()
+        self.feeds = ConditionalFeedFetcher(self.http)
+        self.rss_sources = [
+            'https://lenta.ru/rss/news',
+            'https://www.vedomosti.ru/rss/news',
+            'https://www.kommersant.ru/RSS/news.xml',
+            'https://ria.ru/export/rss2/index.xml',
+            'https://tass.ru/rss/v2.xml',
+            'https://www.rbc.ru/rssfeed/news.rss',
+            'https://news.google.com/rss?hl=ru&gl=RU&ceid=RU:ru'
+        ]
+        # Ленты опрашиваются в фоне (ingester.poll_due по таймеру), поиск идет по локальному хранилищу
+        self.articles = ArticleStore(os.getenv('ARTICLE_STORE_DB'), retention_days=int(os.getenv('ARTICLE_RETENTION_DAYS', '7')))
+        self.ingester = RssIngester(self.feeds, self.articles, self.rss_sources)
     
     async def search_all_sources(self, query, hours_back=24):
         """Упрощенный поиск без Telegram"""
@@ -307,8 +341,8 @@ class SimplePowerfulParser:
         rss_results = await self.search_rss_realtime(query, hours_back)
         results.extend(rss_results)
         
-        # Сортируем по дате
-        results.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
+        # Сначала самые свежие, совпадения с ключевыми словами поднимают статью выше
+        self.keywords.with_extra(query).rank(results)
         
         return self.remove_duplicates(results)[:15]
     
@@ -318,26 +352,26 @@ class SimplePowerfulParser:
         try:
             search_url = f"https://news.google.com/rss/search?q={requests.utils.quote(query)}+Россия&hl=ru&gl=RU&ceid=RU:ru"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries[:10]:
-                            try:
-                                pub_date = date_parser.parse(entry.published)
-                                results.append({
-                                    'title': entry.title,
-                                    'url': entry.link,
-                                    'source': 'Google News',
-                                    'description': entry.get('description', '')[:200] + '...',
-                                    'keywords': [query],
-                                    'date': pub_date.strftime("%Y-%m-%d %H:%M"),
-                                    'timestamp': pub_date.timestamp()
-                                })
-                            except:
-                                continue
+            session = await self.http.get_session()
+            async with session.get(search_url, timeout=10) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    feed = await run_in_parser_pool(feedparser.parse, content)
+                    
+                    for entry in feed.entries[:10]:
+                        try:
+                            pub_date = date_parser.parse(entry.published)
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': 'Google News',
+                                'description': entry.get('description', '')[:200] + '...',
+                                'keywords': [query],
+                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': pub_date.timestamp()
+                            })
+                        except:
+                            continue
         except Exception as e:
             logger.error(f"Google News error: {e}")
         
@@ -350,82 +384,79 @@ class SimplePowerfulParser:
             url = "https://yandex.ru/news/rss/search"
             params = {'text': f'{query} Россия'}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries[:8]:
-                            try:
-                                pub_date = date_parser.parse(entry.published)
-                                results.append({
-                                    'title': entry.title,
-                                    'url': entry.link,
-                                    'source': 'Яндекс.Новости',
-                                    'description': entry.get('description', '')[:200] + '...',
-                                    'keywords': [query],
-                                    'date': pub_date.strftime("%Y-%m-%d %H:%M"),
-                                    'timestamp': pub_date.timestamp()
-                                })
-                            except:
-                                continue
+            session = await self.http.get_session()
+            async with session.get(url, params=params, timeout=10) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    feed = await run_in_parser_pool(feedparser.parse, content)
+                    
+                    for entry in feed.entries[:8]:
+                        try:
+                            pub_date = date_parser.parse(entry.published)
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': 'Яндекс.Новости',
+                                'description': entry.get('description', '')[:200] + '...',
+                                'keywords': [query],
+                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': pub_date.timestamp()
+                            })
+                        except:
+                            continue
         except Exception as e:
             logger.error(f"Yandex News error: {e}")
         
         return results
     
+    def _search_article_store(self, query, hours_back):
+        """Поиск по статьям, которые RssIngester уже собрал из лент"""
+        since = time.time() - hours_back * 3600
+        keywords = self.keywords.with_extra(query)
+        articles = self.articles.search(keywords.keywords, since=since)
+        return [
+            dict(article, keywords=keywords.find(f"{article['title']} {article.get('description', '')}") or [query])
+            for article in articles
+        ]
+
     async def search_rss_realtime(self, query, hours_back=24):
         """Поиск в RSS лентах"""
+        if self.ingester.ready:
+            return self._search_article_store(query, hours_back)
+
+        # Фоновый опрос еще не прошел по всем лентам - читаем их напрямую
         results = []
+        keywords = self.keywords.with_extra(query)
         
-        rss_sources = [
-            'https://lenta.ru/rss/news',
-            'https://www.vedomosti.ru/rss/news',
-            'https://www.kommersant.ru/RSS/news.xml',
-            'https://ria.ru/export/rss2/index.xml',
-            'https://tass.ru/rss/v2.xml',
-            'https://www.rbc.ru/rssfeed/news.rss',
-            'https://news.google.com/rss?hl=ru&gl=RU&ceid=RU:ru'
-        ]
-        
-        async with aiohttp.ClientSession() as session:
-            for rss_url in rss_sources:
+        # Ленты грузятся параллельно с общим сроком: мертвая лента не задерживает остальные
+        feeds = await self.feeds.fetch_many(self.rss_sources, timeout=8)
+        for rss_url, entries in feeds.items():
+            for entry in entries[:5]:
                 try:
-                    async with session.get(rss_url, timeout=8) as response:
-                        if response.status == 200:
-                            content = await response.text()
-                            feed = feedparser.parse(content)
-                            
-                            for entry in feed.entries[:5]:
-                                try:
-                                    pub_date = date_parser.parse(entry.published)
-                                    if datetime.now() - pub_date < timedelta(hours=hours_back):
-                                        content_text = f"{entry.title} {entry.get('description', '')}".lower()
-                                        if any(keyword in content_text for keyword in self.config.KEYWORDS + [query.lower()]):
-                                            results.append({
-                                                'title': entry.title,
-                                                'url': entry.link,
-                                                'source': f"RSS: {rss_url.split('/')[2]}",
-                                                'description': entry.get('description', '')[:150] + '...',
-                                                'keywords': [query],
-                                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
-                                                'timestamp': pub_date.timestamp()
-                                            })
-                                except:
-                                    continue
-                except Exception as e:
+                    pub_date = date_parser.parse(entry.published)
+                    if datetime.now() - pub_date < timedelta(hours=hours_back):
+                        found = keywords.find(f"{entry.title} {entry.get('description', '')}")
+                        if found:
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': f"RSS: {rss_url.split('/')[2]}",
+                                'description': entry.get('description', '')[:150] + '...',
+                                'keywords': found,
+                                'date': pub_date.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': pub_date.timestamp()
+                            })
+                except:
                     continue
         
         return results
     
     def remove_duplicates(self, results):
-        seen_urls = set()
+        seen_urls = CanonicalUrlIndex()
         unique_results = []
         
         for result in results:
-            if result['url'] not in seen_urls:
-                seen_urls.add(result['url'])
+            if seen_urls.add_if_new(result['url']):
                 unique_results.append(result)
         
         return unique_results
@@ -0,0 +1,61 @@
+import asyncio
+import time
+import urllib.parse
+from contextlib import asynccontextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket: не больше rate запросов в секунду с допустимым всплеском burst"""
+
+    def __init__(self, rate=1.0, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Ждет, пока в ведре появится токен, и забирает его"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostThrottle:
+    """Ограничение числа параллельных запросов и их частоты для каждого хоста"""
+
+    def __init__(self, max_concurrency=2, rate=1.0, burst=2):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self._semaphores = {}
+        self._buckets = {}
+
+    def _host(self, url):
+        return urllib.parse.urlparse(url).netloc.lower()
+
+    def _get_limits(self, host):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_concurrency)
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._semaphores[host], self._buckets[host]
+
+    @asynccontextmanager
+    async def limit(self, url):
+        """Контекст для одного запроса к хосту из url"""
+        semaphore, bucket = self._get_limits(self._host(url))
+        async with semaphore:
+            await bucket.acquire()
+            yield
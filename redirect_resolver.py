@@ -0,0 +1,121 @@
+import asyncio
+import re
+import urllib.parse
+import logging
+from contextlib import nullcontext
+
+from http_client import get_http_client
+from search_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_PUBLISHER_URL_RE = re.compile(r'data-n-au="(https?://[^"]+)"')
+
+
+def is_google_news_link(url):
+    """Ссылка вида news.google.com/rss/articles/... или news.google.com/articles/..."""
+    try:
+        parsed = urllib.parse.urlsplit(url or '')
+    except ValueError:
+        return False
+    return parsed.netloc.lower() == 'news.google.com' and '/articles/' in parsed.path
+
+
+class RedirectResolver:
+    """Пакетное асинхронное раскрытие ссылок Google News до адреса издателя.
+
+    Если передан throttle (HostThrottle поисковика), запросы к news.google.com идут
+    через те же лимиты хоста, что и сам поиск. За один вызов resolve_articles
+    раскрывается не больше max_links новых ссылок, остальные остаются как есть.
+    """
+
+    def __init__(self, http_client=None, concurrency=5, timeout=5, cache_ttl=24 * 3600, failure_ttl=300,
+                 max_entries=5000, throttle=None, max_links=5):
+        self.http = http_client or get_http_client()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.throttle = throttle
+        self.max_links = max_links
+        # Раскрытые адреса не меняются, поэтому кэшируем надолго; неудачи (часто это просто
+        # таймаут) - ненадолго, чтобы ссылка не пропадала из выдачи на сутки
+        self.cache = TTLCache(ttl=cache_ttl, max_entries=max_entries, max_bytes=2 * 1024 * 1024)
+        self.failure_ttl = failure_ttl
+        self._semaphore = None
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def _limit(self, url):
+        return self.throttle.limit(url) if self.throttle else nullcontext()
+
+    async def _fetch_target(self, url):
+        session = await self.http.get_session()
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+        async with self._limit(url), session.head(url, headers=headers, allow_redirects=True,
+                                                  timeout=self.timeout) as response:
+            final_url = str(response.url)
+        if 'google.' not in urllib.parse.urlsplit(final_url).netloc:
+            return final_url
+
+        # Google иногда отдает страницу-прокладку вместо HTTP-редиректа: адрес издателя лежит в data-n-au
+        async with self._limit(url), session.get(url, headers=headers, timeout=self.timeout) as response:
+            if response.status == 200:
+                page = await response.content.read(256 * 1024)
+                match = _PUBLISHER_URL_RE.search(page.decode('utf-8', errors='ignore'))
+                if match:
+                    return match.group(1)
+        return None
+
+    async def resolve(self, url):
+        """Адрес издателя для ссылки Google News или None, если раскрыть не удалось"""
+        if not is_google_news_link(url):
+            return url
+
+        cached = self.cache.get(url)
+        if cached is not None:
+            return cached or None
+
+        target = None
+        async with self._get_semaphore():
+            try:
+                target = await self._fetch_target(url)
+            except Exception as e:
+                logger.debug(f"Не удалось раскрыть ссылку Google News {url}: {e}")
+
+        if target:
+            self.cache.set(url, target)
+        else:
+            self.cache.set(url, '', ttl=self.failure_ttl)
+        return target
+
+    async def resolve_many(self, urls):
+        """Раскрывает несколько ссылок параллельно, возвращает словарь исходный адрес -> итоговый"""
+        unique_urls = list(dict.fromkeys(urls))
+        targets = await asyncio.gather(*(self.resolve(url) for url in unique_urls))
+        return dict(zip(unique_urls, targets))
+
+    async def resolve_articles(self, articles):
+        """Подменяет ссылки Google News в статьях на адреса издателей, исходная ссылка сохраняется в google_url"""
+        links = list(dict.fromkeys(article['url'] for article in articles if is_google_news_link(article.get('url'))))
+        if not links:
+            return articles
+
+        # Уже раскрытые берутся из кэша бесплатно, новых запросов - не больше max_links
+        uncached = [link for link in links if self.cache.get(link) is None]
+        if len(uncached) > self.max_links:
+            skipped = set(uncached[self.max_links:])
+            links = [link for link in links if link not in skipped]
+            logger.info(f"🔗 Ссылок Google News больше лимита, не раскрываем: {len(skipped)}")
+
+        resolved = await self.resolve_many(links)
+        for article in articles:
+            target = resolved.get(article.get('url'))
+            if target:
+                article['google_url'] = article['url']
+                article['url'] = target
+
+        logger.info(f"🔗 Раскрыто ссылок Google News: {sum(1 for t in resolved.values() if t)} из {len(resolved)}")
+        return articles
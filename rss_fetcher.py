@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import time
+import logging
+from collections import defaultdict
+
+import feedparser
+
+from http_client import get_http_client, RequestProgress
+from html_parsing import run_in_parser_pool
+from circuit_breaker import EngineHealth
+
+logger = logging.getLogger(__name__)
+
+
+class ConditionalFeedFetcher:
+    """Загрузка RSS с условными запросами.
+
+    Для каждой ленты запоминаются ETag/Last-Modified и уже разобранные записи.
+    Следующий запрос уходит с If-None-Match/If-Modified-Since, и на 304 записи
+    берутся из памяти без скачивания и разбора. Ленты, которые игнорируют
+    валидаторы, не разбираются повторно, если тело ответа не изменилось. Если
+    лента не ответила, отдаются последние успешно полученные записи.
+
+    У каждой ленты свой автомат (см. EngineHealth): ленты, которые раз за разом
+    не отвечают вовремя или отдают 403/429, понижаются - на время паузы запросы к
+    ним не уходят и отдаются последние известные записи. Запрос, отмененный по сроку
+    после того, как получил соединение, считается неудачей ленты ('deadline'); запрос,
+    который так и не дождался соединения из пула, не учитывается.
+    """
+
+    def __init__(self, http_client=None, user_agent=None, health=None):
+        self.http = http_client or get_http_client()
+        self.user_agent = user_agent
+        self.health = health or EngineHealth(window=6, min_calls=3, failure_rate=0.5, slow_call_seconds=6.0,
+                                             base_backoff=120.0, max_backoff=3600.0)
+        self._feeds = {}
+        self._stats = {'full': 0, 'not_modified': 0, 'unchanged': 0, 'errors': 0, 'stale': 0, 'demoted': 0}
+        self._feed_stats = defaultdict(lambda: {'ok': 0, 'errors': 0, 'timeouts': 0, 'queued': 0, 'demoted': 0,
+                                                'latency': None})
+
+    def _conditional_headers(self, state):
+        headers = {}
+        if self.user_agent:
+            headers['User-Agent'] = self.user_agent
+        if state:
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+        return headers
+
+    async def fetch(self, url, timeout=10, **request_kwargs):
+        """Записи ленты (feedparser entries); при ошибке - последние известные или []"""
+        state = self._feeds.get(url)
+        feed_stats = self._feed_stats[url]
+        if not self.health.allow(url):
+            self._stats['demoted'] += 1
+            feed_stats['demoted'] += 1
+            return state['entries'] if state else []
+
+        session = await self.http.get_session()
+        started = time.monotonic()
+        progress = RequestProgress()
+        try:
+            with self.health.track(url) as call:
+                try:
+                    async with session.get(url, headers=self._conditional_headers(state), timeout=timeout,
+                                           trace_request_ctx=progress, **request_kwargs) as response:
+                        if response.status == 304 and state:
+                            self._stats['not_modified'] += 1
+                            feed_stats['ok'] += 1
+                            feed_stats['latency'] = round(time.monotonic() - started, 2)
+                            state['checked_at'] = time.time()
+                            return state['entries']
+
+                        if response.status != 200:
+                            call.fail(f"http_{response.status}")
+                            raise RuntimeError(f"HTTP {response.status}")
+
+                        body = await response.read()
+                        etag = response.headers.get('ETag')
+                        last_modified = response.headers.get('Last-Modified')
+                except asyncio.CancelledError:
+                    # Отмена по сроку (fetch_many): неудача ленты, только если запрос ушел на сервер,
+                    # а не ждал соединения за другими лентами того же хоста
+                    if progress.connected:
+                        call.fail('deadline')
+                        feed_stats['timeouts'] += 1
+                    else:
+                        call.ignore()
+                        feed_stats['queued'] += 1
+                    raise
+        except Exception as e:
+            self._stats['errors'] += 1
+            feed_stats['timeouts' if isinstance(e, asyncio.TimeoutError) else 'errors'] += 1
+            if state:
+                self._stats['stale'] += 1
+                logger.warning(f"RSS feed {url} error: {e}, используем записи от предыдущей загрузки")
+                return state['entries']
+            raise
+
+        feed_stats['ok'] += 1
+        feed_stats['latency'] = round(time.monotonic() - started, 2)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if state and state['digest'] == digest:
+            self._stats['unchanged'] += 1
+            entries = state['entries']
+        else:
+            feed = await run_in_parser_pool(feedparser.parse, body)
+            self._stats['full'] += 1
+            entries = feed.entries
+
+        self._feeds[url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'digest': digest,
+            'entries': entries,
+            'checked_at': time.time(),
+        }
+        return entries
+
+    async def fetch_many(self, urls, timeout=10, deadline=None, **request_kwargs):
+        """Параллельная загрузка лент с общим сроком deadline (по умолчанию timeout + 2 с на разбор).
+
+        Возвращает {лента: записи} в порядке urls; для опоздавших лент - записи от
+        предыдущей загрузки, если они есть. Ошибки отдельных лент логируются и не мешают
+        остальным. Опоздавшие запросы отменяются: соединение закрывается, а в автомат
+        ленты пишется 'deadline', если запрос успел получить соединение (см. fetch).
+        """
+        deadline = deadline if deadline is not None else timeout + 2
+        tasks = {url: asyncio.ensure_future(self.fetch(url, timeout=timeout, **request_kwargs)) for url in urls}
+        if not tasks:
+            return {}
+
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = {}
+        for url, task in tasks.items():
+            if task not in done:
+                # Неудачу (или ожидание соединения) fetch учел при отмене;
+                # в выдачу идут записи от предыдущей загрузки, как при ошибке в fetch
+                state = self._feeds.get(url)
+                if state:
+                    self._stats['stale'] += 1
+                    results[url] = state['entries']
+                logger.warning(f"⏰ RSS feed {url}: не уложилась в общий срок {deadline} с")
+            elif task.exception() is not None:
+                logger.warning(f"RSS feed {url} error: {task.exception()!r}")
+            else:
+                results[url] = task.result()
+        return results
+
+    def stats(self):
+        return dict(self._stats, feeds=len(self._feeds))
+
+    def feed_stats(self):
+        """Статистика по каждой ленте вместе с состоянием ее автомата"""
+        health = self.health.stats()
+        return {url: dict(stats, **health.get(url, {})) for url, stats in self._feed_stats.items()}
@@ -0,0 +1,90 @@
+import asyncio
+import calendar
+import time
+import urllib.parse
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def entry_to_article(entry, feed_url, seen_at=None):
+    """Запись feedparser -> статья хранилища; None, если у записи нет заголовка или ссылки"""
+    title = (entry.get('title') or '').strip()
+    link = (entry.get('link') or '').strip()
+    if not title or not link:
+        return None
+
+    # published_parsed feedparser уже привел к UTC; без даты считаем статью только что появившейся
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    timestamp = calendar.timegm(parsed) if parsed else (seen_at or time.time())
+    description = entry.get('description', '') or ''
+
+    return {
+        'title': title,
+        'url': link,
+        'source': f"RSS: {urllib.parse.urlsplit(feed_url).netloc}",
+        'description': description[:150] + '...',
+        'date': datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M"),
+        'timestamp': timestamp,
+    }
+
+
+class RssIngester:
+    """Фоновый опрос RSS-лент в локальное хранилище статей.
+
+    У каждой ленты свой интервал: если при опросе появились новые статьи, он
+    сокращается (до min_interval), если нет - растет (до max_interval), так что
+    частые ленты опрашиваются чаще редких. poll_due() вызывается планировщиком
+    и опрашивает только ленты, у которых подошел срок.
+    """
+
+    def __init__(self, fetcher, store, feeds, min_interval=120, max_interval=1800, default_interval=300):
+        self.fetcher = fetcher
+        self.store = store
+        self.feeds = list(feeds)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._interval = {feed: default_interval for feed in self.feeds}
+        self._next_due = {feed: 0.0 for feed in self.feeds}
+        self._polled = set()
+
+    @property
+    def ready(self):
+        """Все ленты опрошены хотя бы раз - хранилищу можно доверять вместо живого запроса"""
+        return len(self._polled) == len(self.feeds)
+
+    async def poll_due(self):
+        now = time.monotonic()
+        due = [feed for feed in self.feeds if self._next_due[feed] <= now]
+        if not due:
+            return 0
+
+        counts = await asyncio.gather(*(self._ingest(feed) for feed in due))
+        pruned = self.store.prune()
+        logger.info(f"📥 RSS: опрошено лент {len(due)}, новых статей {sum(counts)}, "
+                    f"удалено устаревших {pruned}, всего в хранилище {len(self.store)}")
+        return sum(counts)
+
+    async def _ingest(self, feed):
+        new_articles = 0
+        try:
+            entries = await self.fetcher.fetch(feed, timeout=10)
+            seen_at = time.time()
+            for entry in entries:
+                article = entry_to_article(entry, feed, seen_at)
+                if article and self.store.add(article):
+                    new_articles += 1
+        except Exception as e:
+            logger.warning(f"RSS feed {feed} error: {e}")
+        self._polled.add(feed)
+
+        if new_articles:
+            self._interval[feed] = max(self.min_interval, self._interval[feed] * 0.7)
+        else:
+            self._interval[feed] = min(self.max_interval, self._interval[feed] * 1.5)
+        self._next_due[feed] = time.monotonic() + self._interval[feed]
+        return new_articles
+
+    def stats(self):
+        return {feed: round(interval) for feed, interval in self._interval.items()}
@@ -0,0 +1,60 @@
+import asyncio
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicScheduler:
+    """Простой планировщик периодических задач внутри event loop"""
+
+    def __init__(self):
+        self._jobs = []
+        self._tasks = []
+
+    def add_job(self, name, func, interval, jitter=0.1, run_immediately=True):
+        """Регистрирует корутинную функцию func, запускаемую каждые interval секунд ± jitter"""
+        self._jobs.append({
+            'name': name,
+            'func': func,
+            'interval': interval,
+            'jitter': jitter,
+            'run_immediately': run_immediately
+        })
+
+    def _next_delay(self, job):
+        spread = job['interval'] * job['jitter']
+        return max(1.0, job['interval'] + random.uniform(-spread, spread))
+
+    async def _run_job(self, job):
+        if not job['run_immediately']:
+            await asyncio.sleep(self._next_delay(job))
+
+        while True:
+            started = asyncio.get_running_loop().time()
+            try:
+                await job['func']()
+                elapsed = asyncio.get_running_loop().time() - started
+                logger.info(f"⏱️ Задача {job['name']} выполнена за {elapsed:.1f} с")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ошибка в периодической задаче {job['name']}: {e}")
+
+            await asyncio.sleep(self._next_delay(job))
+
+    async def start(self):
+        for job in self._jobs:
+            self._tasks.append(asyncio.create_task(self._run_job(job)))
+        logger.info(f"🗓️ Планировщик запущен, задач: {len(self._jobs)}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        logger.info("✅ Планировщик остановлен")
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """Каноническая форма запроса: регистр, Ё→Е, без пунктуации и лишних пробелов"""
+    text = unicodedata.normalize('NFKC', str(query)).casefold().replace('ё', 'е')
+    text = _PUNCTUATION_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def make_cache_key(query, namespace='search'):
+    """Стабильный между процессами ключ кэша для запроса"""
+    digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:20]
+    return f"{namespace}:{digest}"
+
+
+class TTLCache:
+    """LRU-кэш результатов поиска с ограничением по числу записей, объему и времени жизни"""
+
+    def __init__(self, ttl=300, max_entries=1000, max_bytes=10 * 1024 * 1024, sweep_interval=60, backend=None):
+        self.ttl = ttl
+        self.backend = backend
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._last_sweep = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @staticmethod
+    def _estimate_size(value):
+        try:
+            return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+        except (TypeError, ValueError):
+            return len(repr(value).encode('utf-8'))
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+
+    def sweep(self, now=None):
+        """Удаляет все просроченные записи"""
+        now = now or time.time()
+        expired = [key for key, (expires_at, _, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self._last_sweep = now
+        if self.backend:
+            self.backend.purge_expired(now)
+        return len(expired)
+
+    def warm_up(self, limit=None):
+        """Загружает в память непросроченные записи из постоянного хранилища"""
+        if not self.backend:
+            return 0
+
+        loaded = 0
+        for key, expires_at, value in self.backend.load(time.time(), limit or self.max_entries):
+            self._put(key, value, expires_at)
+            loaded += 1
+
+        logger.info(f"♨️ Кэш прогрет из {self.backend.path}: {loaded} записей")
+        return loaded
+
+    def get(self, key):
+        now = time.time()
+        self._maybe_sweep(now)
+
+        item = self._data.get(key)
+        if item is None and self.backend:
+            item = self.backend.get(key, now)
+            if item is not None:
+                expires_at, value = item
+                self._put(key, value, expires_at)
+                item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = item
+        if expires_at <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        self._maybe_sweep(now)
+
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._put(key, value, expires_at)
+        if self.backend:
+            self.backend.set(key, value, expires_at)
+
+    def _put(self, key, value, expires_at):
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Запись {key} ({size} байт) больше лимита кэша, не сохраняем")
+            return
+
+        if key in self._data:
+            self._remove(key)
+
+        self._data[key] = (expires_at, size, value)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._data))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def delete(self, key):
+        if key in self._data:
+            self._remove(key)
+        if self.backend:
+            self.backend.delete(key)
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+
+    def close(self):
+        if self.backend:
+            self.backend.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+class SQLiteCacheBackend:
+    """Постоянное хранилище записей кэша в SQLite, переживает перезапуск процесса"""
+
+    def __init__(self, path='search_cache.db'):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)'
+        )
+
+    def get(self, key, now):
+        try:
+            row = self._conn.execute(
+                'SELECT expires_at, value FROM cache WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            if row:
+                return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"⚠️ Ошибка чтения кэша из SQLite: {e}")
+        return None
+
+    def set(self, key, value, expires_at):
+        try:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)',
+                (key, expires_at, json.dumps(value, ensure_ascii=False, default=str))
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Ошибка записи кэша в SQLite: {e}")
+
+    def delete(self, key):
+        try:
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Ошибка удаления из кэша SQLite: {e}")
+
+    def load(self, now, limit):
+        """Самые долгоживущие непросроченные записи, не больше limit"""
+        try:
+            rows = self._conn.execute(
+                'SELECT key, expires_at, value FROM cache WHERE expires_at > ? '
+                'ORDER BY expires_at DESC LIMIT ?', (now, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Ошибка загрузки кэша из SQLite: {e}")
+            return []
+
+        entries = []
+        # В обратном порядке, чтобы самые свежие записи оказались в конце LRU
+        for key, expires_at, value in reversed(rows):
+            try:
+                entries.append((key, expires_at, json.loads(value)))
+            except ValueError:
+                continue
+        return entries
+
+    def purge_expired(self, now):
+        try:
+            self._conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Ошибка очистки кэша SQLite: {e}")
+
+    def close(self):
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def create_search_cache(ttl=300, **kwargs):
+    """TTLCache с постоянным SQLite-хранилищем, если задана переменная SEARCH_CACHE_DB.
+
+    Кэш переживает перезапуск, только если файл лежит на постоянном диске: при
+    локальном запуске это любой путь, на Render - смонтированный persistent disk
+    (файловая система воркера, включая /tmp, очищается при каждом деплое и рестарте).
+    """
+    backend = None
+    db_path = os.getenv('SEARCH_CACHE_DB')
+    if db_path:
+        try:
+            backend = SQLiteCacheBackend(db_path)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Не удалось открыть кэш {db_path}, работаем только в памяти: {e}")
+
+    cache = TTLCache(ttl=ttl, backend=backend, **kwargs)
+    cache.warm_up()
+    return cache
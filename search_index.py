@@ -0,0 +1,189 @@
+import math
+import re
+import time
+import logging
+from collections import OrderedDict, defaultdict
+
+from text_normalize import STOP_WORDS, fold_homoglyphs
+from url_canon import canonical_url
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+')
+_CYRILLIC_RE = re.compile('[а-я]')
+
+_RUSSIAN_STOP_WORDS = frozenset([
+    'и', 'в', 'во', 'не', 'на', 'с', 'со', 'по', 'к', 'ко', 'о', 'об', 'от', 'до', 'за', 'из', 'у',
+    'для', 'что', 'как', 'а', 'но', 'или', 'это', 'же', 'бы', 'ли', 'при', 'его', 'ее', 'их', 'так',
+]) | STOP_WORDS
+
+# Окончания существительных, прилагательных и глаголов, от длинных к коротким:
+# "песочница", "песочницы", "песочнице", "песочницей" -> "песочниц"
+_RUSSIAN_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах', 'ией', 'ей', 'ой', 'ий', 'ый', 'ое', 'ые', 'ая', 'яя',
+    'ее', 'ие', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых', 'их', 'ым', 'им', 'ом', 'ем', 'ам',
+    'ям', 'ую', 'юю', 'ию', 'ью', 'ья', 'ия', 'ии', 'ев', 'ов', 'ться', 'тся', 'ть',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+], key=len, reverse=True)
+# Короче четырех букв основа не обрезается: иначе "режим" -> "реж", а "режима" -> "режим"
+_MIN_STEM = 4
+
+
+def stem(word):
+    """Легкий стеммер: отрезает одно словоизменительное окончание, основа не короче четырех букв"""
+    if _CYRILLIC_RE.search(word):
+        for ending in _RUSSIAN_ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+                return word[:-len(ending)]
+        return word
+    if len(word) > 4 and word.endswith(('xes', 'ses', 'ches', 'shes')):
+        return word[:-2]
+    if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Основы слов текста без стоп-слов"""
+    tokens = []
+    for word in _TOKEN_RE.findall((text or '').lower().replace('ё', 'е')):
+        word = fold_homoglyphs(word)
+        if len(word) < 2 or word in _RUSSIAN_STOP_WORDS:
+            continue
+        tokens.append(stem(word))
+    return tokens
+
+
+class ArticleIndex:
+    """Инвертированный индекс статей (основа слова -> статьи) с ранжированием BM25.
+
+    Индексируются заголовок и описание, заголовок считается title_weight раз.
+    Ключ статьи - канонический адрес. При переполнении вытесняются самые старые
+    по времени добавления статьи; max_docs=None - без ограничения (размер держит
+    владелец индекса, как ArticleStore сроком хранения).
+    """
+
+    def __init__(self, max_docs=20000, k1=1.2, b=0.75, title_weight=2):
+        self.max_docs = max_docs
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self._docs = OrderedDict()  # ключ -> (статья, длина документа, время добавления)
+        self._postings = defaultdict(dict)  # основа -> {ключ: частота}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, url):
+        return canonical_url(url) in self._docs
+
+    def add(self, article):
+        """Индексирует статью; возвращает False, если она уже есть"""
+        key = canonical_url(article.get('url'))
+        if not key or key in self._docs:
+            return False
+
+        terms = tokenize(article.get('title', '')) * self.title_weight + tokenize(article.get('description', ''))
+        if not terms:
+            return False
+
+        frequencies = defaultdict(int)
+        for term in terms:
+            frequencies[term] += 1
+        for term, frequency in frequencies.items():
+            self._postings[term][key] = frequency
+
+        self._docs[key] = (article, len(terms), time.time())
+        self._total_length += len(terms)
+
+        while self.max_docs is not None and len(self._docs) > self.max_docs:
+            self.remove(next(iter(self._docs)))
+        return True
+
+    def remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        self._total_length -= doc[1]
+        article = doc[0]
+        terms = set(tokenize(article.get('title', '')) + tokenize(article.get('description', '')))
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+
+    def prune(self, older_than):
+        """Удаляет статьи, добавленные раньше older_than (unix time)"""
+        stale = [key for key, (_, _, added_at) in self._docs.items() if added_at < older_than]
+        for key in stale:
+            self.remove(key)
+        return len(stale)
+
+    def _scores(self, terms, require_all):
+        if not terms or not self._docs:
+            return {}
+
+        postings = [self._postings.get(term, {}) for term in terms]
+        if require_all:
+            if not all(postings):
+                return {}
+            candidates = set.intersection(*(set(p) for p in postings))
+        else:
+            candidates = set().union(*postings)
+
+        total = len(self._docs)
+        average_length = self._total_length / total
+        scores = defaultdict(float)
+        for term_postings in postings:
+            if not term_postings:
+                continue
+            idf = math.log(1 + (total - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for key, frequency in term_postings.items():
+                if key not in candidates:
+                    continue
+                length = self._docs[key][1]
+                norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                scores[key] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def _ranked(self, scores, since, limit, predicate=None, added_since=0):
+        results = []
+        for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            article, _, added_at = self._docs[key]
+            if article.get('timestamp', added_at) <= since or added_at <= added_since:
+                continue
+            if predicate is not None and not predicate(article):
+                continue
+            results.append(article)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def search(self, query, limit=10, since=0, require_all=True, predicate=None, added_since=0):
+        """Статьи по запросу от самых релевантных; require_all - все слова запроса должны встретиться.
+        since ограничивает время публикации, added_since - время попадания статьи в индекс"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        return self._ranked(self._scores(terms, require_all), since, limit, predicate, added_since)
+
+    def search_phrases(self, phrases, limit=None, since=0):
+        """Статьи, где встречается хотя бы одна из фраз целиком (все ее слова), ранжированные по BM25"""
+        scores = defaultdict(float)
+        for phrase in phrases:
+            terms = list(dict.fromkeys(tokenize(phrase)))
+            for key, score in self._scores(terms, require_all=True).items():
+                scores[key] += score
+        return self._ranked(scores, since, limit)
+
+
+_index = None
+
+
+def get_article_index():
+    """Общий на процесс индекс найденных поисковиками статей (у ArticleStore свой индекс)"""
+    global _index
+    if _index is None:
+        _index = ArticleIndex()
+    return _index
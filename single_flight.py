@@ -0,0 +1,67 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Объединяет одновременные одинаковые запросы в один вызов.
+
+    Промежуточные результаты общего вызова можно разослать всем ожидающим:
+    вызов получает рассылку через progress(key), а каждый do(..., on_progress=...)
+    подписывается на нее, пока ждет. Присоединившийся позже сразу получает
+    последний разосланный результат.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._listeners = {}
+        self._last_progress = {}
+        self.shared = 0
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+            self._listeners.pop(key, None)
+            self._last_progress.pop(key, None)
+
+    def progress(self, key):
+        """Функция, рассылающая промежуточный результат всем, кто сейчас ждет ключ"""
+        async def notify(result):
+            self._last_progress[key] = result
+            for listener in list(self._listeners.get(key, ())):
+                await self._deliver(key, listener, result)
+        return notify
+
+    @staticmethod
+    async def _deliver(key, listener, result):
+        # Ошибка одного получателя (например, правки сообщения) не должна сорвать общий вызов
+        try:
+            await listener(result)
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка при передаче промежуточного результата {key}: {e}")
+
+    async def do(self, key, coro_factory, on_progress=None):
+        """Выполняет coro_factory() один раз на ключ, остальные вызовы ждут тот же результат"""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(coro_factory())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.shared += 1
+            logger.info(f"🔗 Присоединяемся к уже выполняющемуся запросу {key}")
+
+        if on_progress is None:
+            # shield: отмена одного ожидающего не должна отменять общий запрос
+            return await asyncio.shield(future)
+
+        listeners = self._listeners.setdefault(key, [])
+        listeners.append(on_progress)
+        try:
+            if key in self._last_progress:
+                await self._deliver(key, on_progress, self._last_progress[key])
+            return await asyncio.shield(future)
+        finally:
+            if on_progress in listeners:
+                listeners.remove(on_progress)
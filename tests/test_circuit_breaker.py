@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, EngineHealth
+
+
+def open_breaker(breaker):
+    breaker.record_failure('captcha')
+    assert breaker.state == OPEN
+
+
+def wait_backoff(breaker):
+    # Пауза не ждется по-настоящему: сдвигаем момент размыкания в прошлое
+    breaker.opened_at -= breaker.backoff + 1
+
+
+def test_opens_on_failure_rate_after_min_calls():
+    breaker = CircuitBreaker('yandex', min_calls=4, failure_rate=0.5)
+    breaker.record_success(0.1)
+    breaker.record_failure('timeout')
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_failure('timeout')
+    assert breaker.state == OPEN
+
+
+def test_hard_failure_opens_immediately():
+    breaker = CircuitBreaker('yandex')
+    breaker.record_failure('http_429')
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.skipped == 1
+
+
+def test_slow_success_counts_as_failure():
+    breaker = CircuitBreaker('bing', min_calls=2, slow_call_seconds=1.0)
+    breaker.record_success(5.0)
+    breaker.record_success(5.0)
+    assert breaker.state == OPEN
+    assert breaker.last_reason == 'slow'
+
+
+def test_single_probe_after_backoff_closes_on_success():
+    breaker = CircuitBreaker('yandex')
+    open_breaker(breaker)
+    wait_backoff(breaker)
+    assert breaker.probe_due()
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # второй пробы одновременно не бывает
+
+    breaker.record_success(0.1, breaker.epoch)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_with_doubled_backoff():
+    breaker = CircuitBreaker('yandex', base_backoff=10, max_backoff=100)
+    open_breaker(breaker)
+    first_backoff = breaker.backoff
+    wait_backoff(breaker)
+    assert breaker.allow()
+    breaker.record_failure('timeout', breaker.epoch)
+
+    assert breaker.state == OPEN
+    assert breaker.backoff == pytest.approx(first_backoff * 2, rel=0.25)
+
+
+def test_outcomes_from_before_opening_are_ignored():
+    health = EngineHealth()
+
+    async def main():
+        async def engine(delay, reason=None):
+            with health.track('yandex') as call:
+                await asyncio.sleep(delay)
+                if reason:
+                    call.fail(reason)
+
+        started_before = asyncio.ensure_future(engine(0.05))
+        await asyncio.sleep(0.01)
+        await engine(0, 'captcha')
+        await started_before
+
+    asyncio.run(main())
+    assert health.breaker('yandex').state == OPEN
+
+
+def test_lost_probe_slot_expires():
+    breaker = CircuitBreaker('google_news', probe_timeout=0.01)
+    open_breaker(breaker)
+    wait_backoff(breaker)
+    assert breaker.allow()  # вызывающий упал, не дойдя до health.track
+    assert not breaker.probe_due()
+
+    time.sleep(0.02)
+    assert breaker.probe_due()
+    assert breaker.allow()
+
+
+def test_track_uses_fail_reason_and_start_timer():
+    health = EngineHealth(slow_call_seconds=0.05, min_calls=1)
+
+    with pytest.raises(RuntimeError):
+        with health.track('bing') as call:
+            call.fail('http_403')
+            raise RuntimeError('HTTP 403')
+    assert health.breaker('bing').last_reason == 'http_403'
+
+    with health.track('duckduckgo') as call:
+        time.sleep(0.1)  # ожидание слота хоста
+        call.start_timer()
+    assert health.breaker('duckduckgo').state == CLOSED
+
+
+def test_cancel_releases_probe_slot():
+    health = EngineHealth()
+    breaker = health.breaker('yandex')
+    open_breaker(breaker)
+    wait_backoff(breaker)
+
+    async def main():
+        assert health.allow('yandex')
+
+        async def probe():
+            with health.track('yandex'):
+                await asyncio.sleep(1)
+
+        task = asyncio.ensure_future(probe())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_cancel_records_fail_reason_or_is_ignored():
+    health = EngineHealth(slow_call_seconds=60, min_calls=1)
+
+    async def cancelled(name, mark):
+        async def call_engine():
+            with health.track(name) as call:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    mark(call)
+                    raise
+
+        task = asyncio.ensure_future(call_engine())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled('lenta', lambda call: call.fail('deadline')))
+    asyncio.run(cancelled('ria', lambda call: call.ignore()))
+
+    assert health.breaker('lenta').last_reason == 'deadline'
+    assert health.breaker('lenta').state == OPEN
+    assert health.breaker('ria').last_reason is None
+    assert health.breaker('ria').state == CLOSED
@@ -0,0 +1,81 @@
+from keyword_matcher import KeywordMatcher
+
+
+def test_find_returns_overlapping_keywords_in_original_spelling_and_order():
+    matcher = KeywordMatcher(['ЭПР', 'правовой режим', 'экспериментальный правовой режим', 'режим'])
+
+    text = 'Новый экспериментальный правовой режим (ЭПР) для финтеха'
+
+    assert matcher.find(text) == ['ЭПР', 'правовой режим', 'экспериментальный правовой режим', 'режим']
+
+
+def test_matching_ignores_case_and_yo():
+    matcher = KeywordMatcher(['ЭПР', 'ёлка'])
+
+    assert matcher.find('запуск эпр и ЕЛКА') == ['ЭПР', 'ёлка']
+    assert matcher.matches('Эпр')
+    assert not matcher.matches('ничего подходящего')
+
+
+def test_keywords_sharing_a_prefix_are_all_found():
+    matcher = KeywordMatcher(['банк', 'банкротство', 'банки'])
+
+    assert matcher.find('банкротство банка') == ['банк', 'банкротство']
+    assert matcher.find('банки') == ['банк', 'банки']
+
+
+def test_regex_metacharacters_are_literal():
+    matcher = KeywordMatcher(['c++', 'a.b'])
+
+    assert matcher.find('пишем на c++') == ['c++']
+    assert not matcher.matches('axb')
+
+
+def test_empty_matcher_finds_nothing():
+    matcher = KeywordMatcher(['', '  '])
+
+    assert len(matcher) == 0
+    assert matcher.find('текст') == []
+    assert not matcher.matches('текст')
+
+
+def test_duplicates_by_folded_form_keep_first_spelling():
+    matcher = KeywordMatcher(['ЦБ', 'цб'])
+
+    assert len(matcher) == 1
+    assert matcher.find('решение цб') == ['ЦБ']
+
+
+def test_with_extra_is_cached_per_extra_term():
+    matcher = KeywordMatcher(['банк'])
+
+    extended = matcher.with_extra('Песочница')
+
+    assert matcher.with_extra('песочница') is extended
+    assert matcher.with_extra('финтех') is not extended
+    assert extended.find('регуляторная песочница банка') == ['банк', 'Песочница']
+    assert matcher.find('регуляторная песочница банка') == ['банк']
+
+
+def test_with_extra_cache_is_bounded():
+    matcher = KeywordMatcher(['банк'])
+    matcher.max_extended = 2
+
+    first = matcher.with_extra('a')
+    matcher.with_extra('b')
+    matcher.with_extra('c')
+
+    assert len(matcher._extended) == 2
+    assert matcher.with_extra('a') is not first
+
+
+def test_rank_boosts_articles_with_more_keywords():
+    matcher = KeywordMatcher(['эпр', 'банк'])
+    articles = [
+        {'title': 'без совпадений', 'timestamp': 5000},
+        {'title': 'ЭПР для банка', 'timestamp': 0},
+    ]
+
+    ranked = matcher.rank(articles, boost=3600)
+
+    assert ranked[0]['title'] == 'ЭПР для банка'
@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from redirect_resolver import RedirectResolver
+
+
+class FakeResponse:
+    def __init__(self, url):
+        self.url = url
+        self.status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self):
+        self.requests = []
+
+    def head(self, url, **kwargs):
+        self.requests.append(url)
+        return FakeResponse('https://www.rbc.ru/news/' + url.rsplit('/', 1)[1])
+
+
+class FakeHttp:
+    def __init__(self):
+        self.session = FakeSession()
+
+    async def get_session(self):
+        return self.session
+
+
+class RecordingThrottle:
+    def __init__(self):
+        self.urls = []
+
+    @asynccontextmanager
+    async def limit(self, url):
+        self.urls.append(url)
+        yield
+
+
+def google_link(n):
+    return f'https://news.google.com/rss/articles/{n}'
+
+
+def test_resolution_goes_through_throttle_and_is_capped():
+    http, throttle = FakeHttp(), RecordingThrottle()
+    resolver = RedirectResolver(http, throttle=throttle, max_links=2)
+    articles = [{'title': str(n), 'url': google_link(n)} for n in range(4)]
+
+    resolved = asyncio.run(resolver.resolve_articles(articles))
+
+    assert http.session.requests == throttle.urls == [google_link(0), google_link(1)]
+    assert [article['url'] for article in resolved] == [
+        'https://www.rbc.ru/news/0', 'https://www.rbc.ru/news/1', google_link(2), google_link(3)
+    ]
+    assert resolved[0]['google_url'] == google_link(0)
+
+
+def test_cached_links_do_not_count_against_the_cap():
+    resolver = RedirectResolver(FakeHttp(), max_links=1)
+    resolver.cache.set(google_link(0), 'https://tass.ru/0')
+    articles = [{'title': str(n), 'url': google_link(n)} for n in range(2)]
+
+    resolved = asyncio.run(resolver.resolve_articles(articles))
+    assert [article['url'] for article in resolved] == ['https://tass.ru/0', 'https://www.rbc.ru/news/1']
+
+
+def test_failures_are_cached_briefly():
+    calls = 0
+
+    class FailingResolver(RedirectResolver):
+        async def _fetch_target(self, url):
+            nonlocal calls
+            calls += 1
+            raise asyncio.TimeoutError()
+
+    resolver = FailingResolver(FakeHttp(), failure_ttl=0)
+
+    async def main():
+        assert await resolver.resolve(google_link(0)) is None
+        assert await resolver.resolve(google_link(0)) is None
+
+    asyncio.run(main())
+    assert calls == 2
+
+
+def test_non_google_links_are_returned_as_is():
+    resolver = RedirectResolver(FakeHttp())
+    assert asyncio.run(resolver.resolve('https://ria.ru/1')) == 'https://ria.ru/1'
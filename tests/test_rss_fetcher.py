@@ -0,0 +1,89 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from circuit_breaker import OPEN, EngineHealth
+from http_client import HttpClient
+from rss_fetcher import ConditionalFeedFetcher
+
+RSS = b'''<?xml version="1.0"?>
+<rss version="2.0"><channel><title>feed</title>
+<item><title>news</title><link>https://example.com/news</link></item>
+</channel></rss>'''
+
+
+async def start_feeds(hits):
+    """Две ленты на одном хосте: /ok отвечает сразу, /slow зависает со второго запроса"""
+    async def ok(request):
+        hits['ok'] += 1
+        return web.Response(body=RSS, content_type='application/rss+xml')
+
+    async def slow(request):
+        hits['slow'] += 1
+        if hits['slow'] > 1:
+            await asyncio.sleep(30)
+        return web.Response(body=RSS, content_type='application/rss+xml')
+
+    app = web.Application()
+    app.router.add_get('/ok', ok)
+    app.router.add_get('/slow', slow)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def run_rounds(order, rounds, deadline=0.5):
+    hits = {'ok': 0, 'slow': 0}
+    health = EngineHealth(window=6, min_calls=3, failure_rate=0.5, slow_call_seconds=6.0)
+
+    async def main():
+        server = await start_feeds(hits)
+        # Одно соединение на хост: ленты одного хоста ходят по очереди через пул
+        http = HttpClient(limit_per_host=1)
+        fetcher = ConditionalFeedFetcher(http, health=health)
+        urls = {name: str(server.make_url('/' + name)) for name in order}
+        results = []
+        try:
+            for _ in range(rounds):
+                results.append(await fetcher.fetch_many(list(urls.values()), timeout=10, deadline=deadline))
+        finally:
+            await http.close()
+            await server.close()
+        return fetcher, urls, results
+
+    fetcher, urls, results = asyncio.run(main())
+    return hits, health, fetcher, urls, results
+
+
+def test_cancelled_feed_does_not_block_feed_on_same_host():
+    hits, _, fetcher, urls, results = run_rounds(['ok', 'slow'], rounds=3)
+
+    # Брошенный запрос к /slow не остается в пуле: /ok каждый раз загружается заново
+    assert hits['ok'] == 3
+    assert fetcher.feed_stats()[urls['ok']]['ok'] == 3
+    assert all(len(round_results[urls['ok']]) == 1 for round_results in results)
+
+
+def test_deadline_miss_is_counted_and_demotes_feed():
+    hits, health, fetcher, urls, results = run_rounds(['ok', 'slow'], rounds=4)
+
+    slow = fetcher.feed_stats()[urls['slow']]
+    assert slow['timeouts'] == 2
+    assert slow['demoted'] == 1
+    assert health.breaker(urls['slow']).state == OPEN
+    assert health.breaker(urls['slow']).last_reason == 'deadline'
+    # Пониженная лента не запрашивается, в выдаче - записи от последней удачной загрузки
+    assert hits['slow'] == 3
+    assert len(results[-1][urls['slow']]) == 1
+
+
+def test_feed_waiting_for_connection_is_not_blamed():
+    hits, health, fetcher, urls, results = run_rounds(['slow', 'ok'], rounds=2)
+
+    ok = fetcher.feed_stats()[urls['ok']]
+    assert hits['ok'] == 1
+    assert ok['queued'] == 1
+    assert ok['timeouts'] == 0
+    assert health.breaker(urls['ok']).last_reason is None
+    assert len(results[-1][urls['ok']]) == 1
@@ -0,0 +1,63 @@
+import time
+
+from search_cache import TTLCache, make_cache_key, normalize_query
+
+
+def test_make_cache_key_ignores_case_punctuation_and_spaces():
+    assert make_cache_key('Регуляторная  песочница!') == make_cache_key('регуляторная песочница')
+    assert make_cache_key('ЁЖ') == make_cache_key('еж')
+
+
+def test_make_cache_key_namespaces_differ():
+    assert make_cache_key('ЭПР', 'russian') != make_cache_key('ЭПР', 'all')
+    assert make_cache_key('ЭПР', 'russian').startswith('russian:')
+
+
+def test_normalize_query():
+    assert normalize_query('  Банк   России, ЦБ ') == 'банк россии цб'
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' становится самым старым
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_evicts_by_size():
+    cache = TTLCache(ttl=60, max_entries=100, max_bytes=50)
+    cache.set('a', 'x' * 30)
+    cache.set('b', 'y' * 30)
+    assert len(cache) == 1
+    assert cache.get('b') == 'y' * 30
+
+
+def test_ttl_cache_skips_values_larger_than_limit():
+    cache = TTLCache(ttl=60, max_bytes=10)
+    cache.set('big', 'x' * 100)
+    assert cache.get('big') is None
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=60)
+    cache.set('short', 1, ttl=0.01)
+    cache.set('long', 2)
+    time.sleep(0.02)
+
+    assert cache.get('short') is None
+    assert cache.get('long') == 2
+    assert cache.expirations == 1
+
+
+def test_ttl_cache_sweep_removes_expired():
+    cache = TTLCache(ttl=0.01)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.sweep(time.time() + 1) == 2
+    assert len(cache) == 0
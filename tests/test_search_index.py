@@ -0,0 +1,58 @@
+import time
+
+from article_store import ArticleStore
+from search_index import ArticleIndex, stem, tokenize
+
+
+def article(n, title, **extra):
+    return dict({'title': title, 'url': f'https://www.rbc.ru/news/{n}', 'description': ''}, **extra)
+
+
+def test_stemmer_merges_word_forms():
+    assert {stem(word) for word in ['песочница', 'песочницы', 'песочнице', 'песочницей']} == {'песочниц'}
+    assert {stem(word) for word in ['режим', 'режима', 'режимов']} == {'режим'}
+
+
+def test_tokenize_drops_stop_words_and_folds_yo():
+    tokens = tokenize('Новости о ЦБ и её решениях')
+    assert 'новости' not in tokens and 'и' not in tokens and 'о' not in tokens
+    assert tokens[0] == 'цб'
+    assert tokenize('ёлка') == tokenize('елка')
+
+
+def test_search_finds_other_word_forms_and_ranks_title_matches():
+    index = ArticleIndex()
+    index.add(article(1, 'Регуляторные песочницы расширят', description='банки'))
+    index.add(article(2, 'Банки и финтех', description='новая регуляторная песочница'))
+    index.add(article(3, 'Курс рубля'))
+
+    found = [a['url'] for a in index.search('регуляторная песочница')]
+    assert found == ['https://www.rbc.ru/news/1', 'https://www.rbc.ru/news/2']
+
+
+def test_added_since_filters_by_time_of_indexing():
+    index = ArticleIndex()
+    index.add(article(1, 'Регуляторная песочница'))
+    now = time.time()
+    assert len(index.search('песочница', added_since=now - 300)) == 1
+    assert index.search('песочница', added_since=now + 1) == []
+
+
+def test_eviction_and_unbounded_index():
+    bounded = ArticleIndex(max_docs=2)
+    unbounded = ArticleIndex(max_docs=None)
+    for n in range(3):
+        bounded.add(article(n, f'Песочница {n}'))
+        unbounded.add(article(n, f'Песочница {n}'))
+    assert len(bounded) == 2 and 'https://www.rbc.ru/news/0' not in bounded
+    assert len(unbounded) == 3
+
+
+def test_article_store_search_uses_its_own_index():
+    store = ArticleStore()
+    store.add(article(1, 'ЦБ расширил регуляторные песочницы', timestamp=time.time()))
+    store.add(article(2, 'Курс рубля вырос', timestamp=time.time()))
+
+    found = store.search(['регуляторная песочница', 'экспериментальный правовой режим'])
+    assert [a['url'] for a in found] == ['https://www.rbc.ru/news/1']
+    assert ArticleStore().search(['песочница']) == []
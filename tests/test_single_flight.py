@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = 0
+
+    async def search():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ['статья']
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do('q', search) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert calls == 1
+    assert results == [['статья']] * 5
+    assert flight.shared == 4
+
+
+def test_key_is_forgotten_after_completion():
+    calls = 0
+
+    async def search():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main():
+        flight = SingleFlight()
+        first = await flight.do('q', search)
+        second = await flight.do('q', search)
+        return first, second
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_errors_reach_every_waiter():
+    async def search():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('поисковик недоступен')
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(flight.do('q', search), flight.do('q', search), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelling_one_waiter_keeps_shared_call_running():
+    async def search():
+        await asyncio.sleep(0.05)
+        return 'готово'
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do('q', search))
+        second = asyncio.ensure_future(flight.do('q', search))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'готово'
+
+
+def test_progress_reaches_every_waiter_including_late_joiners():
+    received = {'first': [], 'second': []}
+
+    def listener(name):
+        async def on_progress(result):
+            received[name].append(result)
+        return on_progress
+
+    async def main():
+        flight = SingleFlight()
+        step = asyncio.Event()
+
+        async def search():
+            notify = flight.progress('q')
+            await notify(['яндекс'])
+            await step.wait()
+            await notify(['яндекс', 'bing'])
+            return ['яндекс', 'bing', 'google']
+
+        first = asyncio.ensure_future(flight.do('q', search, on_progress=listener('first')))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do('q', search, on_progress=listener('second')))
+        await asyncio.sleep(0)
+        step.set()
+        return await asyncio.gather(first, second)
+
+    results = asyncio.run(main())
+    assert results[0] == results[1] == ['яндекс', 'bing', 'google']
+    assert received['first'] == [['яндекс'], ['яндекс', 'bing']]
+    # Присоединившийся позже сразу получает последний результат, затем следующие
+    assert received['second'] == [['яндекс'], ['яндекс', 'bing']]
+
+
+def test_failing_listener_does_not_break_the_shared_call():
+    async def broken(result):
+        raise RuntimeError('message is not modified')
+
+    async def main():
+        flight = SingleFlight()
+
+        async def search():
+            await flight.progress('q')(['частично'])
+            return ['полностью']
+
+        return await flight.do('q', search, on_progress=broken)
+
+    assert asyncio.run(main()) == ['полностью']
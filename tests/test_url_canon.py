@@ -0,0 +1,56 @@
+from url_canon import CanonicalUrlIndex, canonical_url, unwrap_redirect
+
+
+def test_scheme_www_fragment_and_trailing_slash_are_ignored():
+    assert canonical_url('https://www.rbc.ru/news/1/#comments') == canonical_url('http://rbc.ru/news/1')
+
+
+def test_amp_versions_collapse():
+    assert canonical_url('https://amp.ria.ru/amp/20240101/news.html') == canonical_url('https://ria.ru/20240101/news.html')
+
+
+def test_utm_and_click_ids_are_dropped_everywhere():
+    assert canonical_url('https://example.org/a?utm_source=yxnews&utm_medium=desktop&yclid=1&id=5') == \
+        canonical_url('https://example.org/a?id=5')
+
+
+def test_query_order_does_not_matter():
+    assert canonical_url('https://example.org/a?b=2&a=1') == canonical_url('https://example.org/a?a=1&b=2')
+
+
+def test_from_is_dropped_only_on_known_tracking_hosts():
+    assert canonical_url('https://www.rbc.ru/economics/1?from=newsfeed') == canonical_url('https://www.rbc.ru/economics/1')
+    # На остальных сайтах from/ref/rss могут менять содержимое страницы
+    assert canonical_url('https://example.org/list?from=20') != canonical_url('https://example.org/list')
+    assert canonical_url('https://example.org/feed?rss=1') != canonical_url('https://example.org/feed')
+
+
+def test_yandex_cl4url_with_scheme_is_unwrapped():
+    wrapped = 'https://news.yandex.ru/story?cl4url=https%3A%2F%2Fwww.rbc.ru%2Fnews%2F1&persistent_id=2'
+    assert unwrap_redirect(wrapped) == 'https://www.rbc.ru/news/1'
+    assert canonical_url(wrapped) == canonical_url('https://www.rbc.ru/news/1')
+
+
+def test_yandex_cl4url_without_scheme_is_unwrapped():
+    wrapped = 'https://news.yandex.ru/story?cl4url=www.rbc.ru%2Fnews%2F1'
+    assert unwrap_redirect(wrapped) == 'https://www.rbc.ru/news/1'
+    assert canonical_url(wrapped) == canonical_url('https://www.rbc.ru/news/1')
+
+
+def test_non_url_redirect_param_is_left_alone():
+    url = 'https://www.google.com/search?q=регуляторная+песочница'
+    assert unwrap_redirect(url) == url
+
+
+def test_duckduckgo_and_bing_wrappers():
+    assert unwrap_redirect('https://duckduckgo.com/l/?uddg=https%3A%2F%2Ftass.ru%2F1') == 'https://tass.ru/1'
+    assert unwrap_redirect('https://www.bing.com/news/apiclick.aspx?url=https%3A%2F%2Fria.ru%2F2') == 'https://ria.ru/2'
+
+
+def test_canonical_url_index():
+    index = CanonicalUrlIndex()
+    assert index.add_if_new('https://www.rbc.ru/news/1?utm_source=x')
+    assert not index.add_if_new('http://rbc.ru/news/1/')
+    assert 'https://rbc.ru/news/1' in index
+    assert not index.add_if_new('')
+    assert len(index) == 1
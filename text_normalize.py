@@ -0,0 +1,35 @@
+import re
+from functools import lru_cache
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_CYRILLIC_RE = re.compile('[а-яё]')
+
+STOP_WORDS = frozenset(['новости', 'сегодня', 'сейчас', 'последние', 'свежие'])
+
+# Латинские буквы, которые выглядят как кириллические: "Банк Pоссии" с латинской P
+_HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е'
+})
+
+
+def fold_homoglyphs(word):
+    """Заменяет латинские двойники на кириллицу в словах, где уже есть кириллица"""
+    if _CYRILLIC_RE.search(word):
+        return word.translate(_HOMOGLYPHS)
+    return word
+
+
+@lru_cache(maxsize=8192)
+def normalize_title(title):
+    """Нормализация заголовка для сравнения и поиска дубликатов"""
+    if not title:
+        return ""
+
+    normalized = title.lower()
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
+    normalized = _PUNCTUATION_RE.sub('', normalized)
+
+    words = (fold_homoglyphs(word) for word in normalized.split())
+    return ' '.join(word for word in words if word not in STOP_WORDS)
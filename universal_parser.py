@@ -1,4 +1,3 @@
-import aiohttp
 import asyncio
 import ssl
 import feedparser
@@ -9,17 +8,23 @@ from telethon import TelegramClient
 from telethon.tl.types import Message
 import os
 from dotenv import load_dotenv
+from http_client import get_http_client
+from html_parsing import run_in_parser_pool
+from url_canon import CanonicalUrlIndex
+from rss_fetcher import ConditionalFeedFetcher
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 class UniversalParser:
-    def __init__(self):
+    def __init__(self, http_client=None):
+        self.http = http_client or get_http_client()
         self.user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         self.ssl_context = ssl.create_default_context()
         self.ssl_context.check_hostname = False
         self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.feeds = ConditionalFeedFetcher(self.http, user_agent=self.user_agent)
         
         # Telegram клиент
         self.tg_client = None
@@ -67,24 +72,23 @@ class UniversalParser:
             encoded_query = urllib.parse.quote(f"{query} Россия")
             url = f"https://news.google.com/rss/search?q={encoded_query}&hl=ru&gl=RU&ceid=RU:ru"
             
-            connector = aiohttp.TCPConnector(ssl=self.ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries[:8]:
-                            published = self.parse_date(entry.get('published', ''))
-                            results.append({
-                                'title': entry.title,
-                                'url': entry.link,
-                                'source': f"Google News: {entry.get('source', {}).get('title', '')}",
-                                'description': entry.get('description', '')[:150] + '...',
-                                'date': published.strftime("%Y-%m-%d %H:%M"),
-                                'timestamp': published.timestamp(),
-                                'type': 'news'
-                            })
+            session = await self.http.get_session()
+            async with session.get(url, timeout=10, ssl=self.ssl_context) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    feed = await run_in_parser_pool(feedparser.parse, content)
+                    
+                    for entry in feed.entries[:8]:
+                        published = self.parse_date(entry.get('published', ''))
+                        results.append({
+                            'title': entry.title,
+                            'url': entry.link,
+                            'source': f"Google News: {entry.get('source', {}).get('title', '')}",
+                            'description': entry.get('description', '')[:150] + '...',
+                            'date': published.strftime("%Y-%m-%d %H:%M"),
+                            'timestamp': published.timestamp(),
+                            'type': 'news'
+                        })
         except Exception as e:
             logger.error(f"Google News error: {e}")
         
@@ -95,26 +99,25 @@ class UniversalParser:
         results = []
         try:
             url = "https://news.yandex.ru/index.rss"
-            connector = aiohttp.TCPConnector(ssl=self.ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries[:6]:
-                            content_text = f"{entry.title} {entry.get('description', '')}".lower()
-                            if any(keyword in content_text for keyword in ['эпр', 'песочница', 'регулятор']):
-                                published = self.parse_date(entry.get('published', ''))
-                                results.append({
-                                    'title': entry.title,
-                                    'url': entry.link,
-                                    'source': 'Яндекс.Новости',
-                                    'description': entry.get('description', '')[:150] + '...',
-                                    'date': published.strftime("%Y-%m-%d %H:%M"),
-                                    'timestamp': published.timestamp(),
-                                    'type': 'news'
-                                })
+            session = await self.http.get_session()
+            async with session.get(url, timeout=10, ssl=self.ssl_context) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    feed = await run_in_parser_pool(feedparser.parse, content)
+                    
+                    for entry in feed.entries[:6]:
+                        content_text = f"{entry.title} {entry.get('description', '')}".lower()
+                        if any(keyword in content_text for keyword in ['эпр', 'песочница', 'регулятор']):
+                            published = self.parse_date(entry.get('published', ''))
+                            results.append({
+                                'title': entry.title,
+                                'url': entry.link,
+                                'source': 'Яндекс.Новости',
+                                'description': entry.get('description', '')[:150] + '...',
+                                'date': published.strftime("%Y-%m-%d %H:%M"),
+                                'timestamp': published.timestamp(),
+                                'type': 'news'
+                            })
         except Exception as e:
             logger.error(f"Yandex News error: {e}")
         
@@ -189,32 +192,25 @@ class UniversalParser:
             'https://www.vedomosti.ru/rss/news',
         ]
         
-        connector = aiohttp.TCPConnector(ssl=self.ssl_context)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
-            for rss_url in rss_feeds:
-                try:
-                    async with session.get(rss_url, timeout=8) as response:
-                        if response.status == 200:
-                            content = await response.text()
-                            feed = feedparser.parse(content)
-                            
-                            for entry in feed.entries[:4]:
-                                content_text = f"{entry.title} {entry.get('description', '')}".lower()
-                                if query.lower() in content_text:
-                                    published = self.parse_date(entry.get('published', ''))
-                                    results.append({
-                                        'title': entry.title,
-                                        'url': entry.link,
-                                        'source': f"RSS: {rss_url.split('/')[2]}",
-                                        'description': entry.get('description', '')[:150] + '...',
-                                        'date': published.strftime("%Y-%m-%d %H:%M"),
-                                        'timestamp': published.timestamp(),
-                                        'type': 'news'
-                                    })
-                except Exception as e:
-                    logger.warning(f"RSS error {rss_url}: {e}")
-                    continue
+        for rss_url in rss_feeds:
+            try:
+                entries = await self.feeds.fetch(rss_url, timeout=8, ssl=self.ssl_context)
+                for entry in entries[:4]:
+                    content_text = f"{entry.title} {entry.get('description', '')}".lower()
+                    if query.lower() in content_text:
+                        published = self.parse_date(entry.get('published', ''))
+                        results.append({
+                            'title': entry.title,
+                            'url': entry.link,
+                            'source': f"RSS: {rss_url.split('/')[2]}",
+                            'description': entry.get('description', '')[:150] + '...',
+                            'date': published.strftime("%Y-%m-%d %H:%M"),
+                            'timestamp': published.timestamp(),
+                            'type': 'news'
+                        })
+            except Exception as e:
+                logger.warning(f"RSS error {rss_url}: {e}")
+                continue
         
         return results
     
@@ -229,22 +225,22 @@ class UniversalParser:
                 'no_html': '1'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for topic in data.get('RelatedTopics', [])[:3]:
-                            if 'FirstURL' in topic and 'Text' in topic:
-                                results.append({
-                                    'title': topic['Text'],
-                                    'url': topic['FirstURL'],
-                                    'source': 'DuckDuckGo',
-                                    'description': 'Результат поиска',
-                                    'date': datetime.now().strftime("%Y-%m-%d"),
-                                    'timestamp': datetime.now().timestamp(),
-                                    'type': 'search'
-                                })
+            session = await self.http.get_session()
+            async with session.get(url, params=params, timeout=10) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    for topic in data.get('RelatedTopics', [])[:3]:
+                        if 'FirstURL' in topic and 'Text' in topic:
+                            results.append({
+                                'title': topic['Text'],
+                                'url': topic['FirstURL'],
+                                'source': 'DuckDuckGo',
+                                'description': 'Результат поиска',
+                                'date': datetime.now().strftime("%Y-%m-%d"),
+                                'timestamp': datetime.now().timestamp(),
+                                'type': 'search'
+                            })
         except Exception as e:
             logger.warning(f"DuckDuckGo error: {e}")
         
@@ -261,11 +257,10 @@ class UniversalParser:
     
     def remove_duplicates(self, results):
         """Удаление дубликатов"""
-        seen = set()
+        seen = CanonicalUrlIndex()
         unique = []
         for item in results:
-            if item['url'] not in seen:
-                seen.add(item['url'])
+            if seen.add_if_new(item['url']):
                 unique.append(item)
         return unique
 
@@ -1,4 +1,3 @@
-from datetime import datetime, timedelta
 import os
 import logging
 import asyncio
@@ -9,16 +8,24 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from dotenv import load_dotenv
 import urllib.parse
 from bs4 import BeautifulSoup
-import json
-import re
 import random
 import sys
 import atexit
-import signal
-from aiohttp import web
-import threading
-import subprocess
 import time
+from rate_limiter import HostThrottle
+from search_cache import create_search_cache, make_cache_key
+from http_client import get_http_client, close_http_client
+from single_flight import SingleFlight
+from debug_capture import DebugCapture
+from url_canon import CanonicalUrlIndex
+from redirect_resolver import RedirectResolver
+from html_parsing import extract_links, run_in_parser_pool, shutdown_parse_executor
+from hedging import LatencyTracker, hedged_first
+from keyword_matcher import KeywordMatcher
+from circuit_breaker import EngineHealth, HARD_FAILURES
+from block_detection import detect_block_page, block_stats
+from scheduler import PeriodicScheduler
+from search_index import get_article_index
 
 # ===== КОНФИГУРАЦИЯ ЛОГГИРОВАНИЯ =====
 logging.basicConfig(
@@ -76,10 +83,31 @@ if not BOT_TOKEN:
 
 # ===== РАБОЧИЙ КЛАСС ПОИСКА =====
 class WorkingNewsSearcher:
-    def __init__(self):
-        self.session = None
-        self.cache = {}
+    def __init__(self, http_client=None):
+        self.http = http_client or get_http_client()
         self.cache_timeout = 300
+        self.cache = create_search_cache(ttl=self.cache_timeout, max_entries=500, max_bytes=5 * 1024 * 1024)
+        # Не больше 2 параллельных запросов и ~1 запроса в секунду на хост
+        self.throttle = HostThrottle(max_concurrency=2, rate=1.0, burst=2)
+        self.fresh_news_concurrent = True
+        self.inflight = SingleFlight()
+        self.debug_capture = DebugCapture()
+        # Раскрытие ссылок Google News идет через те же лимиты хоста, что и поиск
+        self.redirects = RedirectResolver(self.http, throttle=self.throttle)
+        # Слова, по которым ссылки из выдачи Яндекса считаются относящимися к теме
+        self.link_keywords = KeywordMatcher(['эпр', 'регулятор', 'финтех', 'банк', 'новости', 'песочница'])
+        # Задержки зеркал Яндекса: по ним выбирается порядок опроса и момент подстраховки
+        self.yandex_latency = LatencyTracker(default=3.0, failure_penalty=30.0)
+        # Автоматы по поисковикам: капча/429 или частые ошибки отключают поисковик до успешной пробы
+        self.health = EngineHealth()
+        # Все найденные статьи попадают в индекс процесса; запрос сначала ищется в нем (со словоформами),
+        # и если свежих совпадений хватает, поисковики не опрашиваются. Учитываются только статьи,
+        # попавшие в индекс не раньше срока жизни кэша: иначе выдача замерзала бы на часы. По сути это
+        # кэш, который узнает и другие формулировки запроса; RSS-хранилище (bot_powerful) сюда не входит
+        self.index = get_article_index()
+        self.local_index_min_hits = int(os.getenv('LOCAL_INDEX_MIN_HITS', '5'))
+        self.local_index_max_age = 6 * 3600
+        self.local_index_window = self.cache_timeout
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
@@ -88,26 +116,23 @@ class WorkingNewsSearcher:
         ]
 
     async def get_session(self):
-        if self.session is None or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
-            connector = aiohttp.TCPConnector(limit=10, keepalive_timeout=30)
-            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
-        return self.session
-
-    def get_cached_results(self, query):
-        cache_key = f"search_{hash(query)}"
-        if cache_key in self.cache:
-            cache_time, results = self.cache[cache_key]
-            if datetime.now() - cache_time < timedelta(seconds=self.cache_timeout):
-                return results
-        return None
-
-    def set_cached_results(self, query, results):
-        cache_key = f"search_{hash(query)}"
-        self.cache[cache_key] = (datetime.now(), results)
+        return await self.http.get_session()
+
+    @staticmethod
+    def _mirror_host(url):
+        return urllib.parse.urlparse(url).netloc
+
+    def get_cached_results(self, query, namespace='search'):
+        return self.cache.get(make_cache_key(query, namespace))
+
+    def set_cached_results(self, query, results, namespace='search'):
+        self.cache.set(make_cache_key(query, namespace), results)
 
     async def search_yandex_working(self, query):
         """РАБОЧИЙ поиск через Яндекс - имитируем реального пользователя"""
+        if not self.health.allow('yandex'):
+            return []
+
         try:
             session = await self.get_session()
             encoded_query = urllib.parse.quote(query)
@@ -133,60 +158,80 @@ class WorkingNewsSearcher:
                 'Sec-Fetch-User': '?1'
             }
 
-            articles = []
-            
-            for url in urls:
+            # Неудачи зеркал: если не ответило ни одно, причина уходит в автомат поисковика
+            mirror_failures = []
+
+            async def fetch_mirror(url, call):
+                logger.info(f"🔍 Пробуем URL: {url}")
+                articles = []
+
                 try:
-                    logger.info(f"🔍 Пробуем URL: {url}")
-                    
-                    async with session.get(url, headers=headers, timeout=30) as response:
-                        if response.status == 200:
+                    async with self.throttle.limit(url):
+                        # Ожидание слота хоста - локальная очередь, в задержку поисковика не входит
+                        call.start_timer()
+                        async with session.get(url, headers=headers, timeout=30) as response:
+                            if response.status != 200:
+                                logger.warning(f"⚠️ Статус ответа: {response.status}")
+                                mirror_failures.append(f"http_{response.status}")
+                                return articles
+
+                            body = await response.read()
+                            # Капчу и блок-страницы распознаем по сырым байтам, до разбора HTML
+                            reason = detect_block_page('yandex', body, response.url)
+                            if reason:
+                                mirror_failures.append(reason)
+                                return articles
+
                             html = await response.text()
+                except asyncio.TimeoutError:
+                    mirror_failures.append('timeout')
+                    raise
+                except aiohttp.ClientError as e:
+                    mirror_failures.append(type(e).__name__)
+                    raise
+
+                # Сохраняем HTML для отладки (выключено по умолчанию, см. DebugCapture)
+                self.debug_capture.capture('yandex', query, html)
+
+                # ПРОСТОЙ И ЭФФЕКТИВНЫЙ ПАРСИНГ
+                # Разбираем только ссылки, а не всё дерево страницы
+                all_links = await run_in_parser_pool(extract_links, html)
+
+                for href, text in all_links:
+                    try:
+                        # Фильтруем только релевантные ссылки
+                        if (href.startswith('http') and 
+                            not any(domain in href for domain in ['yandex.ru', 'ya.ru', 'yandex.com']) and
+                            len(text) > 10 and  # Заголовок достаточно длинный
+                            self.link_keywords.matches(text)):
                             
-                            # Сохраняем HTML для отладки
-                            with open('yandex_response.html', 'w', encoding='utf-8') as f:
-                                f.write(html)
-                            
-                            soup = BeautifulSoup(html, 'html.parser')
-                            
-                            # ПРОСТОЙ И ЭФФЕКТИВНЫЙ ПАРСИНГ
-                            # Ищем ВСЕ ссылки в результатах поиска
-                            all_links = soup.find_all('a', href=True)
-                            
-                            for link in all_links:
-                                try:
-                                    href = link.get('href', '')
-                                    text = link.get_text().strip()
-                                    
-                                    # Фильтруем только релевантные ссылки
-                                    if (href.startswith('http') and 
-                                        not any(domain in href for domain in ['yandex.ru', 'ya.ru', 'yandex.com']) and
-                                        len(text) > 10 and  # Заголовок достаточно длинный
-                                        any(keyword in text.lower() for keyword in ['эпр', 'регулятор', 'финтех', 'банк', 'новости', 'песочница'])):
-                                        
-                                        # Проверяем российский домен
-                                        domain = urllib.parse.urlparse(href).netloc.lower()
-                                        if any(ru_domain in domain for ru_domain in ['.ru', '.рф', '.su']):
-                                            articles.append({
-                                                'title': text,
-                                                'url': href,
-                                                'language': 'ru'
-                                            })
-                                            logger.info(f"✅ Найдена статья: {text[:60]}...")
-                                            
-                                except Exception as e:
-                                    continue
-                            
-                            # Если нашли статьи, выходим
-                            if articles:
-                                break
+                            # Проверяем российский домен
+                            domain = urllib.parse.urlparse(href).netloc.lower()
+                            if any(ru_domain in domain for ru_domain in ['.ru', '.рф', '.su']):
+                                articles.append({
+                                    'title': text,
+                                    'url': href,
+                                    'language': 'ru'
+                                })
+                                logger.info(f"✅ Найдена статья: {text[:60]}...")
                                 
-                        else:
-                            logger.warning(f"⚠️ Статус ответа: {response.status}")
-                            
-                except Exception as e:
-                    logger.warning(f"⚠️ Ошибка при запросе к {url}: {e}")
-                    continue
+                    except Exception:
+                        continue
+
+                return articles
+
+            # Зеркала опрашиваются от самого быстрого; если оно не ответило за свой p90,
+            # параллельно запускается следующее, первый ответ со статьями отменяет остальные
+            with self.health.track('yandex') as call:
+                mirror, articles = await hedged_first(urls, lambda url: fetch_mirror(url, call), self.yandex_latency,
+                                                      key=self._mirror_host)
+                if mirror is None and len(mirror_failures) == len(urls):
+                    # Капча на любом зеркале важнее таймаутов остальных: она отключает Яндекс сразу
+                    hard = [reason for reason in mirror_failures if reason in HARD_FAILURES]
+                    call.fail(hard[0] if hard else mirror_failures[-1])
+            articles = articles or []
+            if mirror:
+                logger.info(f"🪞 Ответило зеркало {self._mirror_host(mirror)}, p90 зеркал: {self.yandex_latency.stats()}")
 
             logger.info(f"📊 Всего найдено статей: {len(articles)}")
             return articles[:10]
@@ -197,6 +242,9 @@ class WorkingNewsSearcher:
 
     async def search_google_news(self, query):
         """Резервный поиск через Google News"""
+        if not self.health.allow('google_news'):
+            return []
+
         try:
             session = await self.get_session()
             encoded_query = urllib.parse.quote(query)
@@ -208,43 +256,67 @@ class WorkingNewsSearcher:
                 'Accept': 'application/rss+xml, text/xml, */*'
             }
 
-            async with session.get(url, headers=headers, timeout=20) as response:
-                if response.status == 200:
-                    xml_content = await response.text()
-                    soup = BeautifulSoup(xml_content, 'xml')
-                    
-                    articles = []
-                    items = soup.find_all('item')[:10]
-                    
-                    for item in items:
-                        try:
-                            title = item.find('title').text if item.find('title') else ''
-                            link = item.find('link').text if item.find('link') else ''
-                            
-                            if title and link:
-                                articles.append({
-                                    'title': title,
-                                    'url': link,
-                                    'language': 'ru'
-                                })
-                        except:
-                            continue
-                    
-                    logger.info(f"✅ Google News: найдено {len(articles)} статей")
-                    return articles
-                    
-            return []
+            # Задержка поисковика считается после получения слота хоста, без локальной очереди
+            async with self.throttle.limit(url):
+                with self.health.track('google_news') as call:
+                    async with session.get(url, headers=headers, timeout=20) as response:
+                        if response.status != 200:
+                            call.fail(f"http_{response.status}")
+                            return []
+                        xml_content = await response.text()
+
+            self.debug_capture.capture('google_rss', query, xml_content)
+            articles = await run_in_parser_pool(self._parse_google_rss, xml_content)
+            # Ссылки news.google.com/rss/articles/... раскрываем до адреса издателя - уже после
+            # того, как освобождены соединение и слот хоста
+            articles = await self.redirects.resolve_articles(articles)
+
+            logger.info(f"✅ Google News: найдено {len(articles)} статей")
+            return articles
         except Exception as e:
             logger.error(f"❌ Ошибка Google News: {e}")
             return []
 
+    def _parse_google_rss(self, xml_content):
+        """Разбор RSS Google News (выполняется в пуле потоков)"""
+        soup = BeautifulSoup(xml_content, 'xml')
+        
+        articles = []
+        items = soup.find_all('item')[:10]
+        
+        for item in items:
+            try:
+                title = item.find('title').text if item.find('title') else ''
+                link = item.find('link').text if item.find('link') else ''
+                
+                if title and link:
+                    articles.append({
+                        'title': title,
+                        'url': link,
+                        'language': 'ru'
+                    })
+            except:
+                continue
+        
+        return articles
+
     async def search_only_russian(self, query):
         """Поиск в российских источниках"""
-        cache_key = f"russian_{hash(query)}"
-        cached_results = self.get_cached_results(cache_key)
+        cached_results = self.get_cached_results(query, namespace='russian')
         if cached_results:
             return cached_results
 
+        local_articles = self._search_local_index(query, 'russian', self._dedup_articles)
+        if local_articles:
+            return local_articles
+
+        # Одинаковые одновременные запросы ждут один общий поиск
+        return await self.inflight.do(
+            make_cache_key(query, 'russian'),
+            lambda: self._search_only_russian(query)
+        )
+
+    async def _search_only_russian(self, query):
         logger.info(f"🔍 Поиск: {query}")
 
         articles = []
@@ -263,18 +335,42 @@ class WorkingNewsSearcher:
             logger.error(f"❌ Ошибка поиска: {e}")
 
         # Убираем дубликаты
+        unique_articles = self._dedup_articles(articles)
+
+        self._remember(unique_articles)
+        self.set_cached_results(query, unique_articles, namespace='russian')
+        logger.info(f"📊 Итоговые результаты: {len(unique_articles)} статей")
+        return unique_articles
+
+    @staticmethod
+    def _dedup_articles(articles):
         unique_articles = []
-        seen_urls = set()
-        
+        seen_urls = CanonicalUrlIndex()
         for article in articles:
-            if article and article.get('url') and article['url'] not in seen_urls:
-                seen_urls.add(article['url'])
+            if article and seen_urls.add_if_new(article.get('url')):
                 unique_articles.append(article)
-
-        self.set_cached_results(cache_key, unique_articles)
-        logger.info(f"📊 Итоговые результаты: {len(unique_articles)} статей")
         return unique_articles
 
+    def _search_local_index(self, query, namespace, filter_results, predicate=None, limit=10):
+        """Ответ из локального индекса, если в нем уже достаточно свежих статей по запросу.
+
+        Найденное проходит ту же фильтрацию, что и выдача поисковиков, и кэшируется как обычный ответ
+        """
+        now = time.time()
+        hits = self.index.search(query, limit=limit * 2, since=now - self.local_index_max_age,
+                                 predicate=predicate, added_since=now - self.local_index_window)
+        articles = filter_results([dict(article) for article in hits])[:limit]
+        if len(articles) < self.local_index_min_hits:
+            return None
+
+        logger.info(f"📚 Ответ из локального индекса: {len(articles)} статей по '{query}'")
+        self.set_cached_results(query, articles, namespace=namespace)
+        return articles
+
+    def _remember(self, articles):
+        for article in articles:
+            self.index.add(article)
+
     async def get_fresh_news(self):
         """Свежие новости"""
         logger.info("🔍 Поиск свежих новостей...")
@@ -290,30 +386,53 @@ class WorkingNewsSearcher:
 
         all_articles = []
 
-        for query in queries:
-            try:
-                articles = await self.search_only_russian(query)
+        if self.fresh_news_concurrent:
+            # Все запросы параллельно, частоту к поисковикам ограничивает self.throttle
+            results = await asyncio.gather(
+                *(self.search_only_russian(query) for query in queries),
+                return_exceptions=True
+            )
+            for query, articles in zip(queries, results):
+                if isinstance(articles, Exception):
+                    logger.error(f"❌ Ошибка при поиске {query}: {articles}")
+                    continue
                 all_articles.extend(articles)
-                await asyncio.sleep(1)
-            except Exception as e:
-                logger.error(f"❌ Ошибка при поиске {query}: {e}")
-                continue
+        else:
+            for query in queries:
+                try:
+                    articles = await self.search_only_russian(query)
+                    all_articles.extend(articles)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка при поиске {query}: {e}")
+                    continue
 
         # Убираем дубликаты
         unique_articles = []
-        seen_urls = set()
+        seen_urls = CanonicalUrlIndex()
         
         for article in all_articles:
-            if article and article.get('url') and article['url'] not in seen_urls:
-                seen_urls.add(article['url'])
+            if article and seen_urls.add_if_new(article.get('url')):
                 unique_articles.append(article)
 
         logger.info(f"✅ Свежих новостей: {len(unique_articles)}")
         return unique_articles[:8]
 
+    async def probe_engines(self):
+        """Пробные запросы к отключенным поисковикам, у которых истекла пауза"""
+        probes = {
+            'yandex': lambda: self.search_yandex_working("ЦБ РФ новости"),
+            'google_news': lambda: self.search_google_news("ЦБ РФ"),
+        }
+        due = [name for name in self.health.due_for_probe() if name in probes]
+        if due:
+            await asyncio.gather(*(probes[name]() for name in due))
+            logger.info(f"🩺 Состояние поисковиков после проб: {self.health.stats()}")
+
     async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        logger.info(f"📊 Статистика кэша: {self.cache.stats()}")
+        logger.info(f"🩺 Состояние поисковиков: {self.health.stats()}")
+        logger.info(f"🧱 Страницы капчи/блокировки: {block_stats()}")
+        self.cache.close()
 
 # ===== ТЕЛЕГРАМ БОТ =====
 main_keyboard = ReplyKeyboardMarkup(
@@ -430,19 +549,30 @@ class TelegramBot:
     async def stop(self):
         """Остановка бота"""
         await self.searcher.close()
+        await close_http_client()
+        shutdown_parse_executor()
         await self.bot.session.close()
 
 # ===== ЗАПУСК =====
 async def main():
     bot = None
+    scheduler = None
     try:
         bot = TelegramBot()
+
+        # Отключенные автоматом поисковики проверяются в фоне, а не на запросах пользователей
+        scheduler = PeriodicScheduler()
+        scheduler.add_job("engine_probes", bot.searcher.probe_engines, interval=60, jitter=0.2, run_immediately=False)
+        await scheduler.start()
+
         await bot.start()
     except KeyboardInterrupt:
         logger.info("⏹️ Остановка по запросу пользователя")
     except Exception as e:
         logger.error(f"💥 Критическая ошибка: {e}")
     finally:
+        if scheduler:
+            await scheduler.stop()
         if bot:
             await bot.stop()
 
@@ -1,22 +1,31 @@
-from datetime import datetime, timedelta
 import os
 import logging
 import asyncio
-import aiohttp
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from dotenv import load_dotenv
 import urllib.parse
-from bs4 import BeautifulSoup
-import json
 import re
-import random
 import sys
 import atexit
 import signal
 from aiohttp import web
-import threading
+import time
+from search_cache import create_search_cache, make_cache_key
+from http_client import get_http_client, close_http_client
+from single_flight import SingleFlight
+from scheduler import PeriodicScheduler
+from circuit_breaker import EngineHealth
+from search_index import get_article_index
+from block_detection import detect_block_page, block_stats
+from debug_capture import DebugCapture
+from dedup import NearDuplicateIndex
+from text_normalize import normalize_title
+from url_canon import CanonicalUrlIndex, unwrap_redirect
+from redirect_resolver import RedirectResolver, is_google_news_link
+from message_stream import StreamingReply
+from html_parsing import make_soup, run_in_parser_pool, shutdown_parse_executor, YANDEX_NEWS_CARDS, BING_NEWS_CARDS, GOOGLE_NEWS_ARTICLES, DUCKDUCKGO_RESULTS
 
 # ===== УЛУЧШЕННАЯ КОНФИГУРАЦИЯ ЛОГГИРОВАНИЯ =====
 logging.basicConfig(
@@ -126,10 +135,35 @@ if not BOT_TOKEN:
 
 # ===== УЛУЧШЕННЫЙ КЛАСС ПОИСКА НОВОСТЕЙ =====
 class ImprovedNewsSearcher:
-    def __init__(self):
-        self.session = None
-        self.cache = {}
+    def __init__(self, http_client=None):
+        self.http = http_client or get_http_client()
         self.cache_timeout = 300
+        self.cache = create_search_cache(ttl=self.cache_timeout, max_entries=500, max_bytes=5 * 1024 * 1024)
+        self.inflight = SingleFlight()
+        self.debug_capture = DebugCapture()
+        self.redirects = RedirectResolver(self.http)
+        # Дайджест свежих новостей: после digest_ttl отдаем старый и обновляем в фоне,
+        # после digest_max_stale старый дайджест больше не показываем
+        self.digest_ttl = 300
+        self.digest_max_stale = int(os.getenv('DIGEST_MAX_STALE', '3600'))
+        self._background_tasks = set()
+        # Поисковики опрашиваются параллельно: у каждого свой дедлайн, у всего поиска общий бюджет.
+        # Не уложившиеся отменяются, пользователь получает то, что успело прийти
+        # (дедлайн поисковика меньше бюджета, иначе медленный поисковик съедает весь бюджет)
+        self.engine_timeout = float(os.getenv('SEARCH_ENGINE_TIMEOUT', '8'))
+        self.search_budget = float(os.getenv('SEARCH_BUDGET', '12'))
+        self.partial_cache_ttl = 60
+        # Автоматы по поисковикам: после капчи/429 или частых ошибок поисковик пропускается,
+        # а восстановление проверяется фоновыми пробами (probe_engines)
+        self.health = EngineHealth()
+        # Все найденные статьи попадают в индекс процесса; запрос сначала ищется в нем (со словоформами),
+        # и если свежих совпадений хватает, поисковики не опрашиваются. Учитываются только статьи,
+        # попавшие в индекс не раньше срока жизни кэша: иначе выдача замерзала бы на часы. По сути это
+        # кэш, который узнает и другие формулировки запроса; RSS-хранилище (bot_powerful) сюда не входит
+        self.index = get_article_index()
+        self.local_index_min_hits = int(os.getenv('LOCAL_INDEX_MIN_HITS', '5'))
+        self.local_index_max_age = 6 * 3600
+        self.local_index_window = self.cache_timeout
         self.russian_domains = [
             'rbc.ru', 'vedomosti.ru', 'kommersant.ru', 'ria.ru', 'tass.ru',
             'rt.com', 'lenta.ru', 'gazeta.ru', 'iz.ru', 'mk.ru', 'aif.ru',
@@ -141,23 +175,13 @@ class ImprovedNewsSearcher:
         ]
 
     async def get_session(self):
-        if self.session is None or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
-            connector = aiohttp.TCPConnector(limit=10, keepalive_timeout=30)
-            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
-        return self.session
-
-    def get_cached_results(self, query):
-        cache_key = f"search_{hash(query)}"
-        if cache_key in self.cache:
-            cache_time, results = self.cache[cache_key]
-            if datetime.now() - cache_time < timedelta(seconds=self.cache_timeout):
-                return results
-        return None
+        return await self.http.get_session()
+
+    def get_cached_results(self, query, namespace='search'):
+        return self.cache.get(make_cache_key(query, namespace))
 
-    def set_cached_results(self, query, results):
-        cache_key = f"search_{hash(query)}"
-        self.cache[cache_key] = (datetime.now(), results)
+    def set_cached_results(self, query, results, namespace='search', ttl=None):
+        self.cache.set(make_cache_key(query, namespace), results, ttl=ttl)
 
     def is_russian_domain(self, url):
         try:
@@ -170,65 +194,8 @@ class ImprovedNewsSearcher:
         return bool(re.search('[а-яА-Я]', text))
 
     def normalize_title(self, title):
-        """Нормализация заголовка для сравнения"""
-        if not title:
-            return ""
-        
-        normalized = title.lower()
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        
-        stop_words = ['новости', 'сегодня', 'сейчас', 'последние', 'свежие']
-        words = normalized.split()
-        filtered_words = [word for word in words if word not in stop_words]
-        
-        return ' '.join(filtered_words)
-
-    def is_duplicate_article(self, article, existing_articles, similarity_threshold=0.8):
-        """Проверяет, является ли статья дубликатом существующих"""
-        if not article or not existing_articles:
-            return False
-        
-        new_title_normalized = self.normalize_title(article.get('title', ''))
-        new_url = article.get('url', '')
-        
-        for existing in existing_articles:
-            existing_title_normalized = self.normalize_title(existing.get('title', ''))
-            existing_url = existing.get('url', '')
-            
-            if self.is_same_domain(new_url, existing_url):
-                if self.calculate_similarity(new_title_normalized, existing_title_normalized) > similarity_threshold:
-                    return True
-            
-            if self.calculate_similarity(new_title_normalized, existing_title_normalized) > 0.9:
-                return True
-        
-        return False
-
-    def is_same_domain(self, url1, url2):
-        """Проверяет, принадлежат ли URL одному домену"""
-        try:
-            domain1 = urllib.parse.urlparse(url1).netloc
-            domain2 = urllib.parse.urlparse(url2).netloc
-            return domain1 == domain2
-        except:
-            return False
-
-    def calculate_similarity(self, text1, text2):
-        """Вычисляет схожесть двух текстов"""
-        if not text1 or not text2:
-            return 0
-        
-        words1 = set(text1.split())
-        words2 = set(text2.split())
-        
-        if not words1 or not words2:
-            return 0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0
+        """Нормализация заголовка для сравнения (общая кэшируемая реализация)"""
+        return normalize_title(title)
 
     async def correct_spelling_auto(self, text):
         """Автоматическая проверка правописания через Yandex Speller API"""
@@ -336,54 +303,33 @@ class ImprovedNewsSearcher:
             return query
 
     async def search_yandex_news_direct(self, query):
-        try:
-            session = await self.get_session()
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://yandex.ru/news/search?text={encoded_query}"
-
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-            }
-
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-
-                    articles = []
-                    news_cards = soup.find_all('article', class_='mg-card')[:8]
-
-                    for card in news_cards:
-                        try:
-                            title_elem = card.find('h2', class_='mg-card__title') or card.find('a', class_='mg-card__link')
-                            if not title_elem:
-                                continue
-
-                            title = title_elem.get_text().strip()
-                            link = title_elem.get('href', '')
-
-                            if link.startswith('https://news.yandex.ru/yandsearch?'):
-                                match = re.search(r'cl4url=([^&]+)', link)
-                                if match:
-                                    link = urllib.parse.unquote(match.group(1))
-                            elif link.startswith('/'):
-                                link = f"https://yandex.ru{link}"
-
-                            if link and not any(
-                                domain in link for domain in [
-                                    'google.com/search',
-                                    'yandex.ru/search']):
-                                articles.append({
-                                    'title': title,
-                                    'url': link,
-                                    'language': 'ru'
-                                })
-                        except Exception as e:
-                            continue
-
-                    return articles
+        if not self.health.allow('yandex_news'):
             return []
+
+        try:
+            with self.health.track('yandex_news') as call:
+                session = await self.get_session()
+                encoded_query = urllib.parse.quote(query)
+                url = f"https://yandex.ru/news/search?text={encoded_query}"
+
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+                }
+
+                async with session.get(url, headers=headers, timeout=15) as response:
+                    if response.status == 200:
+                        body = await response.read()
+                        # Капчу и блок-страницы распознаем по сырым байтам, до разбора HTML
+                        reason = detect_block_page('yandex_news', body, response.url)
+                        if reason:
+                            call.fail(reason)
+                            return []
+                        html = await response.text()
+                        self.debug_capture.capture('yandex_news', query, html)
+                        return await run_in_parser_pool(self._parse_yandex_news, html)
+                    call.fail(f"http_{response.status}")
+                return []
         except asyncio.TimeoutError:
             logger.warning("⏰ Таймаут при поиске в Яндекс.Новостях")
             return []
@@ -391,73 +337,75 @@ class ImprovedNewsSearcher:
             logger.debug(f"Ошибка Яндекс.Новостей: {e}")
             return []
 
-    async def search_bing_news_improved(self, query, market='ru-RU', exclude_russian=False):
-        try:
-            session = await self.get_session()
-            encoded_query = urllib.parse.quote(query)
-            
-            if market == 'en-US':
-                url = f"https://www.bing.com/news/search?q={encoded_query}&cc=us&setlang=en"
-            else:
-                url = f"https://www.bing.com/news/search?q={encoded_query}&cc={market}"
+    def _parse_yandex_news(self, html):
+        """Разбор карточек Яндекс.Новостей (выполняется в пуле потоков)"""
+        soup = make_soup(html, parse_only=YANDEX_NEWS_CARDS)
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9' if market == 'en-US' else 'ru-RU,ru;q=0.9',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-            }
+        articles = []
+        news_cards = soup.find_all('article', class_='mg-card')[:8]
 
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-
-                    articles = []
-
-                    news_cards = soup.find_all('div', class_='news-card')[:8]
-                    if not news_cards:
-                        news_cards = soup.find_all('div', class_='tile')[:8]
-                    if not news_cards:
-                        news_cards = soup.find_all('article')[:8]
-
-                    for card in news_cards:
-                        try:
-                            title_elem = (card.find('a', class_='title') or
-                                        card.find('a', class_=re.compile('title')) or
-                                        card.find('h2') or
-                                        card.find('h3') or
-                                        card.find('a', attrs={'href': True}))
-
-                            if title_elem and title_elem.get('href'):
-                                title = title_elem.get_text().strip()
-                                url = title_elem.get('href')
-
-                                if url.startswith('/'):
-                                    url = f"https://www.bing.com{url}"
-
-                                if 'bing.com/news/search' in url:
-                                    continue
-
-                                if exclude_russian and self.is_russian_domain(url):
-                                    continue
-
-                                if exclude_russian and self.is_russian_text(title):
-                                    continue
-
-                                if url and not any(
-                                    search_domain in url for search_domain in [
-                                        'google.com/search',
-                                        'bing.com/search']):
-                                    articles.append({
-                                        'title': title,
-                                        'url': url,
-                                        'language': 'en' if market == 'en-US' else 'ru'
-                                    })
-                        except Exception:
-                            continue
+        for card in news_cards:
+            try:
+                title_elem = card.find('h2', class_='mg-card__title') or card.find('a', class_='mg-card__link')
+                if not title_elem:
+                    continue
+
+                title = title_elem.get_text().strip()
+                link = title_elem.get('href', '')
+
+                if link.startswith('https://news.yandex.ru/yandsearch?'):
+                    match = re.search(r'cl4url=([^&]+)', link)
+                    if match:
+                        link = urllib.parse.unquote(match.group(1))
+                elif link.startswith('/'):
+                    link = f"https://yandex.ru{link}"
+
+                if link and not any(
+                    domain in link for domain in [
+                        'google.com/search',
+                        'yandex.ru/search']):
+                    articles.append({
+                        'title': title,
+                        'url': link,
+                        'language': 'ru'
+                    })
+            except Exception:
+                continue
 
-                    return articles
+        return articles
+
+    async def search_bing_news_improved(self, query, market='ru-RU', exclude_russian=False):
+        if not self.health.allow('bing'):
             return []
+
+        try:
+            with self.health.track('bing') as call:
+                session = await self.get_session()
+                encoded_query = urllib.parse.quote(query)
+            
+                if market == 'en-US':
+                    url = f"https://www.bing.com/news/search?q={encoded_query}&cc=us&setlang=en"
+                else:
+                    url = f"https://www.bing.com/news/search?q={encoded_query}&cc={market}"
+
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept-Language': 'en-US,en;q=0.9' if market == 'en-US' else 'ru-RU,ru;q=0.9',
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+                }
+
+                async with session.get(url, headers=headers, timeout=15) as response:
+                    if response.status == 200:
+                        body = await response.read()
+                        reason = detect_block_page('bing', body, response.url)
+                        if reason:
+                            call.fail(reason)
+                            return []
+                        html = await response.text()
+                        self.debug_capture.capture('bing', query, html)
+                        return await run_in_parser_pool(self._parse_bing_news, html, market, exclude_russian)
+                    call.fail(f"http_{response.status}")
+                return []
         except asyncio.TimeoutError:
             logger.warning("⏰ Таймаут при поиске в Bing News")
             return []
@@ -465,54 +413,94 @@ class ImprovedNewsSearcher:
             logger.debug(f"Ошибка Bing News: {e}")
             return []
 
-    async def search_google_news_english(self, query, exclude_russian=True):
-        try:
-            session = await self.get_session()
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://news.google.com/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
+    def _parse_bing_news(self, html, market, exclude_russian):
+        """Разбор карточек Bing News (выполняется в пуле потоков)"""
+        soup = make_soup(html, parse_only=BING_NEWS_CARDS)
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-            }
+        articles = []
 
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-
-                    articles = []
-                    news_cards = soup.find_all('article')[:10]
-
-                    for card in news_cards:
-                        try:
-                            title_elem = card.find('h3') or card.find('h4') or card.find('a', attrs={'href': True})
-                            if title_elem:
-                                title = title_elem.get_text().strip()
-                                link_elem = title_elem.find_parent('a') if title_elem.name != 'a' else title_elem
-                                if link_elem and link_elem.get('href'):
-                                    url = link_elem.get('href')
-                                    if url.startswith('./'):
-                                        url = f"https://news.google.com{url[1:]}"
-                                    
-                                    if 'news.google.com' in url:
-                                        continue
-
-                                    if exclude_russian and (self.is_russian_domain(url) or self.is_russian_text(title)):
-                                        continue
-
-                                    if url and url.startswith('http'):
-                                        articles.append({
-                                            'title': title,
-                                            'url': url,
-                                            'language': 'en'
-                                        })
-                        except Exception:
-                            continue
+        news_cards = soup.find_all('div', class_='news-card')[:8]
+        if not news_cards:
+            news_cards = soup.find_all('div', class_='tile')[:8]
+        if not news_cards:
+            news_cards = soup.find_all('article')[:8]
+
+        for card in news_cards:
+            try:
+                title_elem = (card.find('a', class_='title') or
+                            card.find('a', class_=re.compile('title')) or
+                            card.find('h2') or
+                            card.find('h3') or
+                            card.find('a', attrs={'href': True}))
+
+                if title_elem and title_elem.get('href'):
+                    title = title_elem.get_text().strip()
+                    url = title_elem.get('href')
+
+                    if url.startswith('/'):
+                        url = f"https://www.bing.com{url}"
+
+                    if 'bing.com/news/search' in url:
+                        continue
+
+                    if exclude_russian and self.is_russian_domain(url):
+                        continue
 
-                    return articles
+                    if exclude_russian and self.is_russian_text(title):
+                        continue
+
+                    if url and not any(
+                        search_domain in url for search_domain in [
+                            'google.com/search',
+                            'bing.com/search']):
+                        articles.append({
+                            'title': title,
+                            'url': url,
+                            'language': 'en' if market == 'en-US' else 'ru'
+                        })
+            except Exception:
+                continue
+
+        return articles
+
+    async def search_google_news_english(self, query, exclude_russian=True):
+        if not self.health.allow('google_news'):
             return []
+
+        try:
+            with self.health.track('google_news') as call:
+                session = await self.get_session()
+                encoded_query = urllib.parse.quote(query)
+                url = f"https://news.google.com/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
+
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+                }
+
+                async with session.get(url, headers=headers, timeout=15) as response:
+                    if response.status != 200:
+                        call.fail(f"http_{response.status}")
+                        return []
+                    body = await response.read()
+                    reason = detect_block_page('google_news', body, response.url)
+                    if reason:
+                        call.fail(reason)
+                        return []
+                    html = await response.text()
+
+            self.debug_capture.capture('google_news', query, html)
+            articles = await run_in_parser_pool(self._parse_google_news, html, exclude_russian)
+
+            # Ссылки news.google.com/articles/... раскрываем до адреса издателя - уже после
+            # того, как освобождено соединение
+            articles = await self.redirects.resolve_articles(articles)
+            return [
+                article for article in articles
+                if not is_google_news_link(article['url']) and
+                not (exclude_russian and self.is_russian_domain(article['url']))
+            ]
         except asyncio.TimeoutError:
             logger.warning("⏰ Таймаут при поиске в Google News")
             return []
@@ -520,59 +508,69 @@ class ImprovedNewsSearcher:
             logger.debug(f"Ошибка Google News: {e}")
             return []
 
-    async def search_duckduckgo_improved(self, query, exclude_russian=True):
-        try:
-            session = await self.get_session()
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://html.duckduckgo.com/html/?q={encoded_query}+news&kl=us-en"
+    def _parse_google_news(self, html, exclude_russian):
+        """Разбор статей Google News (выполняется в пуле потоков)"""
+        soup = make_soup(html, parse_only=GOOGLE_NEWS_ARTICLES)
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-            }
+        articles = []
+        news_cards = soup.find_all('article')[:10]
 
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-
-                    articles = []
-                    results = soup.find_all('div', class_='result')[:10]
-
-                    for result in results:
-                        try:
-                            title_elem = result.find('a', class_='result__a')
-                            if title_elem:
-                                title = title_elem.get_text().strip()
-                                url = title_elem.get('href', '')
-
-                                if 'duckduckgo.com' in url:
-                                    match = re.search(r'uddg=([^&]+)', url)
-                                    if match:
-                                        url = urllib.parse.unquote(match.group(1))
-
-                                if any(
-                                    domain in url for domain in [
-                                        'google.com/search',
-                                        'bing.com/search',
-                                        'yandex.ru/search']):
-                                    continue
-
-                                if exclude_russian and (self.is_russian_domain(url) or self.is_russian_text(title)):
-                                    continue
-
-                                if url and url.startswith('http'):
-                                    articles.append({
-                                        'title': title,
-                                        'url': url,
-                                        'language': 'en'
-                                    })
-                        except Exception:
+        for card in news_cards:
+            try:
+                title_elem = card.find('h3') or card.find('h4') or card.find('a', attrs={'href': True})
+                if title_elem:
+                    title = title_elem.get_text().strip()
+                    link_elem = title_elem.find_parent('a') if title_elem.name != 'a' else title_elem
+                    if link_elem and link_elem.get('href'):
+                        url = link_elem.get('href')
+                        if url.startswith('./'):
+                            url = f"https://news.google.com{url[1:]}"
+                        
+                        if 'news.google.com' in url and not is_google_news_link(url):
+                            continue
+
+                        if exclude_russian and (self.is_russian_domain(url) or self.is_russian_text(title)):
                             continue
 
-                    return articles
+                        if url and url.startswith('http'):
+                            articles.append({
+                                'title': title,
+                                'url': url,
+                                'language': 'en'
+                            })
+            except Exception:
+                continue
+
+        return articles
+
+    async def search_duckduckgo_improved(self, query, exclude_russian=True):
+        if not self.health.allow('duckduckgo'):
             return []
+
+        try:
+            with self.health.track('duckduckgo') as call:
+                session = await self.get_session()
+                encoded_query = urllib.parse.quote(query)
+                url = f"https://html.duckduckgo.com/html/?q={encoded_query}+news&kl=us-en"
+
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+                }
+
+                async with session.get(url, headers=headers, timeout=15) as response:
+                    if response.status == 200:
+                        body = await response.read()
+                        reason = detect_block_page('duckduckgo', body, response.url)
+                        if reason:
+                            call.fail(reason)
+                            return []
+                        html = await response.text()
+                        self.debug_capture.capture('duckduckgo', query, html)
+                        return await run_in_parser_pool(self._parse_duckduckgo, html, exclude_russian)
+                    call.fail(f"http_{response.status}")
+                return []
         except asyncio.TimeoutError:
             logger.warning("⏰ Таймаут при поиске в DuckDuckGo")
             return []
@@ -580,37 +578,209 @@ class ImprovedNewsSearcher:
             logger.debug(f"Ошибка DuckDuckGo: {e}")
             return []
 
-    async def search_only_russian(self, query):
-        """Поиск ТОЛЬКО в российских источниках"""
-        cache_key = f"russian_only_{hash(query)}"
-        cached_results = self.get_cached_results(cache_key)
+    def _parse_duckduckgo(self, html, exclude_russian):
+        """Разбор выдачи DuckDuckGo (выполняется в пуле потоков)"""
+        soup = make_soup(html, parse_only=DUCKDUCKGO_RESULTS)
+
+        articles = []
+        results = soup.find_all('div', class_='result')[:10]
+
+        for result in results:
+            try:
+                title_elem = result.find('a', class_='result__a')
+                if title_elem:
+                    title = title_elem.get_text().strip()
+                    url = title_elem.get('href', '')
+
+                    if 'duckduckgo.com' in url:
+                        match = re.search(r'uddg=([^&]+)', url)
+                        if match:
+                            url = urllib.parse.unquote(match.group(1))
+
+                    if any(
+                        domain in url for domain in [
+                            'google.com/search',
+                            'bing.com/search',
+                            'yandex.ru/search']):
+                        continue
+
+                    if exclude_russian and (self.is_russian_domain(url) or self.is_russian_text(title)):
+                        continue
+
+                    if url and url.startswith('http'):
+                        articles.append({
+                            'title': title,
+                            'url': url,
+                            'language': 'en'
+                        })
+            except Exception:
+                continue
+
+        return articles
+
+    async def _with_query(self, prepared_query, search, *args, **kwargs):
+        """Ждет подготовленный запрос и вызывает с ним поисковик.
+
+        Запрос общий для нескольких поисковиков, поэтому он ждется через shield: таймаут
+        одного поисковика не должен отменять перевод для остальных (его отменяет _universal_search)
+        """
+        international_query = await asyncio.shield(prepared_query)
+        return await search(international_query, *args, **kwargs)
+
+    async def _run_engines(self, engines, budget=None, on_results=None):
+        """Опрашивает поисковики параллельно в пределах общего бюджета времени.
+
+        engines - список пар (название, корутина). Возвращает (результаты, complete):
+        complete=False, если кто-то не уложился в свой дедлайн или в бюджет и его
+        результаты не вошли в ответ. on_results(результаты) вызывается после ответа
+        каждого поисковика, пока остальные еще работают.
+        """
+        budget = self.search_budget if budget is None else budget
+        tasks = {
+            asyncio.ensure_future(asyncio.wait_for(coro, self.engine_timeout)): name
+            for name, coro in engines
+        }
+        if not tasks:
+            return [], True
+
+        started = time.monotonic()
+        deadline = started + budget
+        done, pending = set(), set(tasks)
+        while pending:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            finished, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not finished:
+                break
+            done |= finished
+            for task in finished:
+                self._log_engine_result(tasks[task], task)
+            if pending and on_results is not None:
+                try:
+                    await on_results(self._collect_engine_results(tasks, done))
+                except Exception as e:
+                    logger.error(f"❌ Ошибка обработки промежуточных результатов: {e}")
+
+        for task in pending:
+            task.cancel()
+            logger.warning(f"⏰ {tasks[task]}: не уложился в бюджет {budget:.0f} с, ответ без него")
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        complete = not pending and all(not task.cancelled() and task.exception() is None for task in done)
+        logger.info(f"⏱️ Поисковики опрошены за {time.monotonic() - started:.1f} с"
+                    f"{'' if complete else ' (частичный ответ)'}")
+        return self._collect_engine_results(tasks, done), complete
+
+    def _log_engine_result(self, name, task):
+        if task.cancelled():
+            logger.error(f"❌ {name}: отменен")
+        elif isinstance(task.exception(), asyncio.TimeoutError):
+            logger.warning(f"⏰ {name}: не ответил за {self.engine_timeout:.0f} с")
+        elif task.exception() is not None:
+            logger.error(f"❌ {name}: {task.exception()}")
+        else:
+            logger.info(f"✅ {name}: {len(task.result() or [])} статей")
+
+    @staticmethod
+    def _collect_engine_results(tasks, done):
+        # Порядок результатов - как в списке поисковиков, а не по времени ответа
+        all_results = []
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is None:
+                all_results.extend(task.result() or [])
+        return all_results
+
+    def _search_local_index(self, query, namespace, filter_results, predicate=None, limit=10):
+        """Ответ из локального индекса, если в нем уже достаточно свежих статей по запросу.
+
+        Найденное проходит ту же фильтрацию, что и выдача поисковиков (обертки ссылок, длина
+        заголовка, дубликаты), и кэшируется как обычный ответ
+        """
+        now = time.time()
+        hits = self.index.search(query, limit=limit * 2, since=now - self.local_index_max_age,
+                                 predicate=predicate, added_since=now - self.local_index_window)
+        articles = filter_results([dict(article) for article in hits])[:limit]
+        if len(articles) < self.local_index_min_hits:
+            return None
+
+        logger.info(f"📚 Ответ из локального индекса: {len(articles)} статей по '{query}'")
+        self.set_cached_results(query, articles, namespace=namespace)
+        return articles
+
+    def _remember(self, articles):
+        for article in articles:
+            self.index.add(article)
+
+    def _local_predicate(self, search_type):
+        """Фильтр статей из локального индекса под тип поиска: в индексе статьи всех поисков сразу"""
+        if search_type == "russian":
+            return lambda article: article.get('language') == 'ru' or self.is_russian_domain(article['url'])
+        if search_type == "international":
+            return lambda article: not (self.is_russian_domain(article['url']) or
+                                        self.is_russian_text(article.get('title', '')))
+        return None
+
+    async def search_only_russian(self, query, on_progress=None):
+        """Поиск ТОЛЬКО в российских источниках; on_progress получает промежуточную выдачу"""
+        cached_results = self.get_cached_results(query, namespace='russian_only')
         if cached_results:
             logger.info("✅ Используем кэшированные результаты (только российские)")
             return cached_results
 
+        local_articles = self._search_local_index(query, 'russian_only', self._filter_russian_results, limit=6)
+        if local_articles:
+            return local_articles
+
+        # Промежуточная выдача общего поиска рассылается всем, кто его ждет, а не только первому
+        key = make_cache_key(query, 'russian_only')
+        return await self.inflight.do(
+            key,
+            lambda: self._search_only_russian(query, self.inflight.progress(key)),
+            on_progress=on_progress
+        )
+
+    async def _search_only_russian(self, query, on_progress=None):
         logger.info(f"🔍 Поиск ТОЛЬКО в российских источниках: {query}")
 
-        all_results = []
+        all_results, complete = await self._run_engines([
+            ("Яндекс.Новости", self.search_yandex_news_direct(query)),
+            ("Bing Россия", self.search_bing_news_improved(query, 'ru-RU')),
+        ], on_results=self._progress_callback(on_progress, self._filter_russian_results, 6))
 
-        try:
-            # Только российские источники
-            yandex_results = await self.search_yandex_news_direct(query)
-            all_results.extend(yandex_results)
-            logger.info(f"✅ Яндекс.Новости: {len(yandex_results)} статей")
+        filtered_results = self._filter_russian_results(all_results)
+        self._remember(filtered_results)
+        final_results = filtered_results[:6]  # Ограничиваем 6 статьями
+        
+        # Неполный ответ кэшируем ненадолго, чтобы следующий запрос добрал отставшие поисковики
+        self.set_cached_results(query, final_results, namespace='russian_only',
+                                ttl=None if complete else self.partial_cache_ttl)
+        logger.info(f"📊 Итоговые российские результаты: {len(final_results)} статей")
+        return final_results
 
-            bing_ru_results = await self.search_bing_news_improved(query, 'ru-RU')
-            all_results.extend(bing_ru_results)
-            logger.info(f"✅ Bing Россия: {len(bing_ru_results)} статей")
+    @staticmethod
+    def _progress_callback(on_progress, filter_results, limit):
+        """Оборачивает on_progress: промежуточные результаты проходят ту же фильтрацию, что и итоговые"""
+        if on_progress is None:
+            return None
 
-        except Exception as e:
-            logger.error(f"❌ Ошибка в поиске российских новостей: {e}")
+        async def on_results(all_results):
+            articles = filter_results(all_results)[:limit]
+            if articles:
+                await on_progress(articles)
+        return on_results
 
+    def _filter_russian_results(self, all_results):
         # Фильтрация только российских доменов
         filtered_results = []
         seen_titles = set()
+        seen_urls = CanonicalUrlIndex()
         
         for result in all_results:
             if result and result.get('url'):
+                # Ссылки-обертки Bing/Яндекса заменяем адресом издателя
+                result['url'] = unwrap_redirect(result['url'])
                 url = result['url'].lower()
                 
                 # Фильтрация поисковых страниц
@@ -629,66 +799,77 @@ class ImprovedNewsSearcher:
                     
                 if url.startswith('http') and len(url) > 20:
                     normalized_title = self.normalize_title(result.get('title', ''))
-                    if normalized_title and normalized_title not in seen_titles and len(normalized_title) >= 20:
+                    if (normalized_title and normalized_title not in seen_titles and
+                            len(normalized_title) >= 20 and seen_urls.add_if_new(result['url'])):
                         seen_titles.add(normalized_title)
                         filtered_results.append(result)
 
         filtered_results.sort(key=lambda x: len(x.get('title', '')), reverse=True)
-        
-        final_results = filtered_results[:6]  # Ограничиваем 6 статьями
-        
-        self.set_cached_results(cache_key, final_results)
-        logger.info(f"📊 Итоговые российские результаты: {len(final_results)} статей")
-        return final_results
+        return filtered_results
 
-    async def universal_search(self, query, search_type="all"):
-        cache_key = f"{search_type}_{query}"
-        cached_results = self.get_cached_results(cache_key)
+    async def universal_search(self, query, search_type="all", on_progress=None):
+        """Поиск по всем/российским/международным источникам; on_progress получает промежуточную выдачу"""
+        cached_results = self.get_cached_results(query, namespace=search_type)
         if cached_results:
             logger.info("✅ Используем кэшированные результаты")
             return cached_results
 
-        all_results = []
+        local_articles = self._search_local_index(
+            query, search_type, lambda results: self._filter_universal_results(results, search_type),
+            predicate=self._local_predicate(search_type))
+        if local_articles:
+            return local_articles
+
+        key = make_cache_key(query, search_type)
+        return await self.inflight.do(
+            key,
+            lambda: self._universal_search(query, search_type, self.inflight.progress(key)),
+            on_progress=on_progress
+        )
+
+    async def _universal_search(self, query, search_type, on_progress=None):
+        engines = []
+        if search_type in ["all", "russian"]:
+            logger.info(f"🔍 Поиск в российских источниках: {query}")
+            engines.append(("Яндекс.Новости", self.search_yandex_news_direct(query)))
+            engines.append(("Bing Россия", self.search_bing_news_improved(query, 'ru-RU')))
+
+        international_query = None
+        if search_type in ["all", "international"]:
+            logger.info(f"🌍 Поиск в международных источниках: {query}")
+            # Запрос переводится один раз, международные поисковики ждут его параллельно с российскими
+            international_query = asyncio.ensure_future(self.prepare_international_query(query))
+            engines.append(("Google News", self._with_query(
+                international_query, self.search_google_news_english, exclude_russian=True)))
+            engines.append(("Bing International", self._with_query(
+                international_query, self.search_bing_news_improved, 'en-US', exclude_russian=True)))
+            engines.append(("DuckDuckGo", self._with_query(
+                international_query, self.search_duckduckgo_improved, exclude_russian=True)))
 
         try:
-            if search_type in ["all", "russian"]:
-                logger.info(f"🔍 Поиск в российских источниках: {query}")
-
-                yandex_results = await self.search_yandex_news_direct(query)
-                all_results.extend(yandex_results)
-                logger.info(f"✅ Яндекс.Новости: {len(yandex_results)} статей")
-
-                bing_ru_results = await self.search_bing_news_improved(query, 'ru-RU')
-                all_results.extend(bing_ru_results)
-                logger.info(f"✅ Bing Россия: {len(bing_ru_results)} статей")
-
-            if search_type in ["all", "international"]:
-                logger.info(f"🌍 Поиск в международных источниках: {query}")
-
-                international_query = await self.prepare_international_query(query)
-                logger.info(f"🌍 Подготовленный запрос: {international_query}")
-
-                google_results = await self.search_google_news_english(international_query, exclude_russian=True)
-                all_results.extend(google_results)
-                logger.info(f"✅ Google News: {len(google_results)} статей")
-
-                bing_en_results = await self.search_bing_news_improved(international_query, 'en-US', exclude_russian=True)
-                all_results.extend(bing_en_results)
-                logger.info(f"✅ Bing International: {len(bing_en_results)} статей")
-
-                duckduckgo_results = await self.search_duckduckgo_improved(international_query, exclude_russian=True)
-                all_results.extend(duckduckgo_results)
-                logger.info(f"✅ DuckDuckGo: {len(duckduckgo_results)} статей")
-
-        except Exception as e:
-            logger.error(f"❌ Ошибка в универсальном поиске: {e}")
+            all_results, complete = await self._run_engines(engines, on_results=self._progress_callback(
+                on_progress, lambda results: self._filter_universal_results(results, search_type), 10))
+        finally:
+            if international_query is not None and not international_query.done():
+                international_query.cancel()
+
+        filtered_results = self._filter_universal_results(all_results, search_type)
+        self._remember(filtered_results)
+        self.set_cached_results(query, filtered_results[:10], namespace=search_type,
+                                ttl=None if complete else self.partial_cache_ttl)
+        logger.info(f"📊 Итоговые уникальные результаты: {len(filtered_results)} статей")
+        return filtered_results[:10]
 
+    def _filter_universal_results(self, all_results, search_type):
         # Улучшенная фильтрация дубликатов
         filtered_results = []
         seen_titles = set()
+        seen_urls = CanonicalUrlIndex()
         
         for result in all_results:
             if result and result.get('url'):
+                # Ссылки-обертки Bing/Яндекса заменяем адресом издателя
+                result['url'] = unwrap_redirect(result['url'])
                 url = result['url'].lower()
                 
                 if any(search_domain in url for search_domain in [
@@ -707,22 +888,41 @@ class ImprovedNewsSearcher:
                         
                 if url.startswith('http') and len(url) > 20:
                     normalized_title = self.normalize_title(result.get('title', ''))
-                    if normalized_title and normalized_title not in seen_titles and len(normalized_title) >= 20:
+                    if (normalized_title and normalized_title not in seen_titles and
+                            len(normalized_title) >= 20 and seen_urls.add_if_new(result['url'])):
                         seen_titles.add(normalized_title)
                         filtered_results.append(result)
 
         filtered_results.sort(key=lambda x: len(x.get('title', '')), reverse=True)
-        
-        self.set_cached_results(cache_key, filtered_results[:10])
-        logger.info(f"📊 Итоговые уникальные результаты: {len(filtered_results)} статей")
-        return filtered_results[:10]
+        return filtered_results
 
     async def get_fresh_news_today(self):
-        cache_key = "fresh_news_today"
-        cached_results = self.get_cached_results(cache_key)
-        if cached_results:
-            return cached_results
-
+        digest = self.get_cached_results("fresh_news_today", namespace='digest')
+        if digest and digest.get('articles'):
+            age = time.time() - digest['built_at']
+            if age > self.digest_ttl:
+                logger.info(f"♻️ Дайджест устарел на {int(age)} с, отдаем старый и обновляем в фоне")
+                self.refresh_fresh_news_in_background()
+            return digest['articles']
+
+        return await self.rebuild_fresh_news()
+
+    async def rebuild_fresh_news(self):
+        """Пересобирает дайджест свежих новостей (одна сборка на все одновременные вызовы)"""
+        return await self.inflight.do(make_cache_key("fresh_news_today", "digest"), self._build_fresh_news_today)
+
+    def refresh_fresh_news_in_background(self):
+        """Запускает пересборку дайджеста, если она еще не идет"""
+        task = asyncio.create_task(self.rebuild_fresh_news())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_done)
+
+    def _on_background_done(self, task):
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ Ошибка фонового обновления дайджеста: {task.exception()}")
+
+    async def _build_fresh_news_today(self):
         logger.info("🔍 Поиск свежих новостей за сегодня...")
 
         today_queries = [
@@ -735,6 +935,8 @@ class ImprovedNewsSearcher:
         ]
 
         all_articles = []
+        # MinHash/LSH вместо попарного сравнения с каждой уже найденной статьей
+        dedup_index = NearDuplicateIndex()
 
         for query in today_queries:
             try:
@@ -744,7 +946,7 @@ class ImprovedNewsSearcher:
                 bing_results = await self.search_bing_news_improved(query, 'ru-RU')
 
                 for article in yandex_results + bing_results:
-                    if not self.is_duplicate_article(article, all_articles):
+                    if dedup_index.add_if_new(article):
                         all_articles.append(article)
 
                 await asyncio.sleep(1)
@@ -754,10 +956,13 @@ class ImprovedNewsSearcher:
                 continue
 
         filtered_articles = []
+        filtered_index = NearDuplicateIndex()
         seen_titles = set()
+        seen_urls = CanonicalUrlIndex()
         
         for article in all_articles:
             if article and article.get('url'):
+                article['url'] = unwrap_redirect(article['url'])
                 url = article['url'].lower()
                 
                 if any(search_domain in url for search_domain in [
@@ -770,9 +975,10 @@ class ImprovedNewsSearcher:
                 if len(normalized_title) < 20:
                     continue
                     
-                if normalized_title not in seen_titles:
+                if normalized_title not in seen_titles and seen_urls.add_if_new(article['url']):
                     seen_titles.add(normalized_title)
                     filtered_articles.append(article)
+                    filtered_index.add(article)
 
         if len(filtered_articles) < 4:
             logger.info("🔍 Дополнительный поиск свежих новостей...")
@@ -790,7 +996,9 @@ class ImprovedNewsSearcher:
                         normalized_title = self.normalize_title(article.get('title', ''))
                         if (normalized_title not in seen_titles and 
                             len(normalized_title) >= 20 and
-                            not self.is_duplicate_article(article, filtered_articles)):
+                            article.get('url') not in seen_urls and
+                            filtered_index.add_if_new(article)):
+                            seen_urls.add_if_new(article['url'])
                             seen_titles.add(normalized_title)
                             filtered_articles.append(article)
                     await asyncio.sleep(1)
@@ -811,14 +1019,36 @@ class ImprovedNewsSearcher:
         filtered_articles.sort(key=relevance_score, reverse=True)
         final_articles = filtered_articles[:8]
 
-        self.set_cached_results(cache_key, final_articles)
+        self.set_cached_results(
+            "fresh_news_today",
+            {'built_at': time.time(), 'articles': final_articles},
+            namespace='digest',
+            ttl=self.digest_ttl + self.digest_max_stale
+        )
 
         logger.info(f"✅ Найдено уникальных свежих новостей: {len(final_articles)}")
         return final_articles
 
+    async def probe_engines(self):
+        """Пробные запросы к отключенным поисковикам, у которых истекла пауза"""
+        probes = {
+            'yandex_news': lambda: self.search_yandex_news_direct("ЦБ РФ"),
+            'bing': lambda: self.search_bing_news_improved("ЦБ РФ", 'ru-RU'),
+            'google_news': lambda: self.search_google_news_english("central bank"),
+            'duckduckgo': lambda: self.search_duckduckgo_improved("central bank"),
+        }
+        due = [name for name in self.health.due_for_probe() if name in probes]
+        if due:
+            await asyncio.gather(*(probes[name]() for name in due))
+            logger.info(f"🩺 Состояние поисковиков после проб: {self.health.stats()}")
+
     async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        for task in list(self._background_tasks):
+            task.cancel()
+        logger.info(f"📊 Статистика кэша: {self.cache.stats()}")
+        logger.info(f"🩺 Состояние поисковиков: {self.health.stats()}")
+        logger.info(f"🧱 Страницы капчи/блокировки: {block_stats()}")
+        self.cache.close()
 
 # ===== ГЛОБАЛЬНЫЕ ПЕРЕМЕННЫЕ =====
 main_keyboard = ReplyKeyboardMarkup(
@@ -936,95 +1166,111 @@ class RobustBot:
             if user_text.startswith('/') or user_text in buttons:
                 return
 
-            await message.answer(f"🔍 Ищу новости по запросу: '{user_text}'...")
-            await self.process_search(message, user_text, user_id)
+            status_message = await message.answer(f"🔍 Ищу новости по запросу: '{user_text}'...")
+            await self.process_search(message, user_text, user_id, status_message)
+
+    @staticmethod
+    def _format_articles(articles, start=1):
+        text = ""
+        for i, article in enumerate(articles, start):
+            text += f"{i}. {article['title']}\n"
+            text += f"   🔗 {article['url']}\n\n"
+        return text
+
+    def _format_sections(self, header, russian_articles, international_articles, continue_numbering=False):
+        response = header
+        if russian_articles:
+            response += "🇷🇺 Российские источники:\n\n"
+            response += self._format_articles(russian_articles[:3])
+        if international_articles:
+            response += "🌍 Международные источники:\n\n"
+            start_index = len(russian_articles[:3]) + 1 if continue_numbering else 1
+            response += self._format_articles(international_articles[:3], start_index)
+        return response
+
+    async def process_search(self, message, user_text, user_id, status_message=None):
+        # Результаты первого ответившего поисковика показываем сразу и дописываем
+        # в то же сообщение по мере ответа остальных
+        reply = StreamingReply(message, status_message)
+        in_progress = "⏳ Ищу в остальных источниках..."
 
-    async def process_search(self, message, user_text, user_id):
         try:
             search_type = user_search_type.pop(user_id, 'all')
-            
+            not_found_hint = "💡 Попробуйте изменить формулировку запроса."
+
             if search_type == 'quick':
-                # Быстрый поиск: российские + международные источники
-                russian_articles = await self.news_searcher.universal_search(user_text, "russian")
-                international_query = await self.news_searcher.prepare_international_query(user_text)
-                international_articles = await self.news_searcher.universal_search(international_query, "international")
-                
+                # Быстрый поиск: российские + международные источники, обе части параллельно
+                header = f"🔍 Результаты быстрого поиска по '{user_text}':\n\n"
+                partial = {'russian': [], 'international': []}
+
+                def progress(part):
+                    async def on_progress(articles):
+                        partial[part] = articles
+                        await reply.update(self._format_sections(
+                            header, partial['russian'], partial['international'], continue_numbering=True) + in_progress)
+                    return on_progress
+
+                async def search_international():
+                    international_query = await self.news_searcher.prepare_international_query(user_text)
+                    return await self.news_searcher.universal_search(
+                        international_query, "international", on_progress=progress('international'))
+
+                russian_articles, international_articles = await asyncio.gather(
+                    self.news_searcher.universal_search(user_text, "russian", on_progress=progress('russian')),
+                    search_international()
+                )
+
                 if russian_articles or international_articles:
-                    response = f"🔍 Результаты быстрого поиска по '{user_text}':\n\n"
-                    
-                    if russian_articles:
-                        response += "🇷🇺 Российские источники:\n\n"
-                        for i, article in enumerate(russian_articles[:3], 1):
-                            response += f"{i}. {article['title']}\n"
-                            response += f"   🔗 {article['url']}\n\n"
-                    
-                    if international_articles:
-                        response += "🌍 Международные источники:\n\n"
-                        start_index = len(russian_articles[:3]) + 1
-                        for i, article in enumerate(international_articles[:3], start_index):
-                            response += f"{i}. {article['title']}\n"
-                            response += f"   🔗 {article['url']}\n\n"
+                    response = self._format_sections(
+                        header, russian_articles, international_articles, continue_numbering=True)
                 else:
-                    response = f"😔 По запросу '{user_text}' не найдено новостей.\n\n"
-                    response += "💡 Попробуйте изменить формулировку запроса."
-                    
-            elif search_type == 'international':
-                # Международные источники
-                international_query = await self.news_searcher.prepare_international_query(user_text)
-                articles = await self.news_searcher.universal_search(international_query, "international")
-                
-                if articles:
-                    response = f"🔍 Результаты поиска по '{user_text}':\n\n"
-                    for i, article in enumerate(articles[:6], 1):
-                        response += f"{i}. {article['title']}\n"
-                        response += f"   🔗 {article['url']}\n\n"
+                    response = f"😔 По запросу '{user_text}' не найдено новостей.\n\n" + not_found_hint
+
+            elif search_type in ('international', 'russian'):
+                header = f"🔍 Результаты поиска по '{user_text}':\n\n"
+
+                async def on_progress(articles):
+                    await reply.update(header + self._format_articles(articles[:6]) + in_progress)
+
+                if search_type == 'international':
+                    # Международные источники
+                    international_query = await self.news_searcher.prepare_international_query(user_text)
+                    articles = await self.news_searcher.universal_search(
+                        international_query, "international", on_progress=on_progress)
+                    sources = "в международных источниках"
                 else:
-                    response = f"😔 По запросу '{user_text}' не найдено новостей в международных источниках.\n\n"
-                    response += "💡 Попробуйте изменить формулировку запроса."
-                    
-            elif search_type == 'russian':
-                # ТОЛЬКО российские источники
-                articles = await self.news_searcher.search_only_russian(user_text)
-                
+                    # ТОЛЬКО российские источники
+                    articles = await self.news_searcher.search_only_russian(user_text, on_progress=on_progress)
+                    sources = "в российских источниках"
+
                 if articles:
-                    response = f"🔍 Результаты поиска по '{user_text}':\n\n"
-                    for i, article in enumerate(articles[:6], 1):
-                        response += f"{i}. {article['title']}\n"
-                        response += f"   🔗 {article['url']}\n\n"
+                    response = header + self._format_articles(articles[:6])
                 else:
-                    response = f"😔 По запросу '{user_text}' не найдено новостей в российских источниках.\n\n"
-                    response += "💡 Попробуйте изменить формулировку запроса."
-                    
+                    response = f"😔 По запросу '{user_text}' не найдено новостей {sources}.\n\n" + not_found_hint
+
             else:
                 # По умолчанию: все источники (для текстовых сообщений без выбора типа)
-                articles = await self.news_searcher.universal_search(user_text, "all")
-                
+                header = f"🔍 Результаты поиска по '{user_text}':\n\n"
+
+                def by_language(articles):
+                    return ([a for a in articles if a.get('language') == 'ru'],
+                            [a for a in articles if a.get('language') == 'en'])
+
+                async def on_progress(articles):
+                    await reply.update(self._format_sections(header, *by_language(articles)) + in_progress)
+
+                articles = await self.news_searcher.universal_search(user_text, "all", on_progress=on_progress)
+
                 if articles:
-                    russian_articles = [a for a in articles if a.get('language') == 'ru']
-                    english_articles = [a for a in articles if a.get('language') == 'en']
-
-                    response = f"🔍 Результаты поиска по '{user_text}':\n\n"
-
-                    if russian_articles:
-                        response += "🇷🇺 Российские источники:\n\n"
-                        for i, article in enumerate(russian_articles[:3], 1):
-                            response += f"{i}. {article['title']}\n"
-                            response += f"   🔗 {article['url']}\n\n"
-
-                    if english_articles:
-                        response += "🌍 Международные источники:\n\n"
-                        for i, article in enumerate(english_articles[:3], 1):
-                            response += f"{i}. {article['title']}\n"
-                            response += f"   🔗 {article['url']}\n\n"
+                    response = self._format_sections(header, *by_language(articles))
                 else:
-                    response = f"😔 По запросу '{user_text}' не найдено новостей.\n\n"
-                    response += "💡 Попробуйте изменить формулировку запроса."
+                    response = f"😔 По запросу '{user_text}' не найдено новостей.\n\n" + not_found_hint
 
-            await message.answer(response)
+            await reply.finish(response)
 
         except Exception as e:
             logger.error(f"❌ Ошибка поиска: {e}")
-            await message.answer(f"❌ Ошибка при поиске. Попробуйте другой запрос.")
+            await reply.finish("❌ Ошибка при поиске. Попробуйте другой запрос.")
 
     async def start(self):
         """Запуск бота с улучшенной обработкой ошибок"""
@@ -1091,6 +1337,7 @@ async def main():
     """Основная функция запуска бота с улучшенной обработкой SIGTERM"""
     bot_instance = None
     health_server = None
+    scheduler = None
     shutdown_manager = GracefulShutdown()
     
     try:
@@ -1099,6 +1346,23 @@ async def main():
         await health_server.start()
         
         bot_instance = RobustBot()
+
+        # Дайджест свежих новостей собирается по таймеру, кнопка только читает кэш
+        scheduler = PeriodicScheduler()
+        scheduler.add_job(
+            "fresh_news_digest",
+            bot_instance.news_searcher.rebuild_fresh_news,
+            interval=int(os.getenv('DIGEST_REFRESH_MINUTES', '5')) * 60,
+            jitter=0.1
+        )
+        scheduler.add_job(
+            "engine_probes",
+            bot_instance.news_searcher.probe_engines,
+            interval=60,
+            jitter=0.2,
+            run_immediately=False
+        )
+        await scheduler.start()
         
         # Запускаем бота в отдельной task
         bot_task = asyncio.create_task(bot_instance.start())
@@ -1140,6 +1404,9 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Критическая ошибка в main(): {e}")
     finally:
+        if scheduler:
+            await scheduler.stop()
+
         # Всегда останавливаем health server
         if health_server:
             await health_server.stop()
@@ -1147,10 +1414,12 @@ async def main():
         if bot_instance:
             await bot_instance.stop()
 
+        # Общий HTTP-пул закрываем последним, после всех поисковиков
+        await close_http_client()
+        shutdown_parse_executor()
+
 # ===== ЗАПУСК ПРИЛОЖЕНИЯ С БЕСКОНЕЧНЫМИ ПЕРЕЗАПУСКАМИ =====
 if __name__ == "__main__":
-    import time
-    
     restart_delay = 3  # Начальная задержка в секундах
     max_restart_delay = 300  # Максимальная задержка (5 минут)
     total_restarts = 0  # Счетчик перезапусков для логов
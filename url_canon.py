@@ -0,0 +1,143 @@
+import hashlib
+import re
+import urllib.parse
+from functools import lru_cache
+
+# Параметры-обертки редиректов: Bing apiclick, Яндекс cl4url, DuckDuckGo uddg, google.com/url
+_REDIRECT_PARAMS = {
+    'bing.com': ('url', 'u'),
+    'news.yandex.ru': ('cl4url',),
+    'yandex.ru': ('cl4url',),
+    'duckduckgo.com': ('uddg',),
+    'google.com': ('url', 'q'),
+    'news.google.com': ('url',),
+}
+
+_TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'yclid', 'ysclid', 'mc_cid', 'mc_eid', 'ref_src',
+    'amp', 'outputtype', 'utm', '_openstat'
+])
+# from/ref/rss/in на многих сайтах - параметры содержимого (страница, раздел, фильтр),
+# поэтому отбрасываются только на сайтах, где они заведомо метят источник перехода
+_HOST_TRACKING_PARAMS = {
+    'rbc.ru': frozenset(['from']),
+    'kommersant.ru': frozenset(['from']),
+    'lenta.ru': frozenset(['from']),
+    'vedomosti.ru': frozenset(['from']),
+    'iz.ru': frozenset(['from']),
+    'ria.ru': frozenset(['in']),
+    'vc.ru': frozenset(['ref', 'from']),
+    'habr.com': frozenset(['ref', 'from', 'rss']),
+}
+# Адрес без схемы в параметре-обертке: cl4url=www.rbc.ru%2F...
+_SCHEMELESS_URL_RE = re.compile(r'^(//)?[\w-]+(\.[\w-]+)+(:\d+)?(/|\?|$)')
+_AMP_SEGMENT_RE = re.compile(r'/amp(?=/|$)')
+_MULTI_SLASH_RE = re.compile(r'/{2,}')
+
+
+def _host_tracking_params(host):
+    for domain, params in _HOST_TRACKING_PARAMS.items():
+        if host == domain or host.endswith('.' + domain):
+            return params
+    return frozenset()
+
+
+def _host_key(host):
+    for prefix in ('www.', 'm.', 'amp.', 'mobile.'):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def unwrap_redirect(url, max_depth=3):
+    """Достает целевой адрес из ссылок-оберток поисковиков"""
+    for _ in range(max_depth):
+        try:
+            parsed = urllib.parse.urlsplit(url)
+        except ValueError:
+            return url
+
+        host = _host_key(parsed.netloc.lower().split(':')[0])
+        params = _REDIRECT_PARAMS.get(host)
+        if not params:
+            return url
+
+        query = urllib.parse.parse_qs(parsed.query)
+        target = next((query[name][0] for name in params if query.get(name)), None)
+        if not target:
+            return url
+        if not target.startswith('http'):
+            if not _SCHEMELESS_URL_RE.match(target):
+                return url
+            target = 'https://' + target.lstrip('/')
+        url = target
+    return url
+
+
+@lru_cache(maxsize=8192)
+def canonical_url(url):
+    """Каноническая форма адреса статьи для поиска дубликатов между поисковиками"""
+    if not url:
+        return ''
+
+    url = unwrap_redirect(url.strip())
+    try:
+        parsed = urllib.parse.urlsplit(url)
+    except ValueError:
+        return url.lower()
+
+    host = parsed.netloc.lower()
+    if '@' in host:
+        host = host.rsplit('@', 1)[1]
+    if host.endswith(':80') or host.endswith(':443'):
+        host = host.rsplit(':', 1)[0]
+    host = _host_key(host)
+
+    path = _MULTI_SLASH_RE.sub('/', parsed.path or '/')
+    path = _AMP_SEGMENT_RE.sub('', path) or '/'
+    if path.endswith('.amp'):
+        path = path[:-4]
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    host_params = _host_tracking_params(host)
+    query = [
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in _TRACKING_PARAMS
+        and key.lower() not in host_params
+    ]
+    query.sort()
+
+    # Схему и фрагмент не учитываем: http/https и #якоря ведут на ту же статью
+    canonical = host + path
+    if query:
+        canonical += '?' + urllib.parse.urlencode(query)
+    return canonical
+
+
+class CanonicalUrlIndex:
+    """Множество уже встреченных статей по хешу канонического адреса"""
+
+    def __init__(self):
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._seen)
+
+    @staticmethod
+    def _digest(url):
+        return hashlib.blake2b(canonical_url(url).encode('utf-8'), digest_size=12).digest()
+
+    def __contains__(self, url):
+        return self._digest(url) in self._seen
+
+    def add_if_new(self, url):
+        """Запоминает адрес; возвращает False, если такая статья уже встречалась"""
+        if not url:
+            return False
+        digest = self._digest(url)
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        return True